@@ -0,0 +1,179 @@
+"""
+Batch Disease Prediction Helpers
+Unpacks multi-image / ZIP / tar uploads and aggregates per-image results into a field diagnosis
+"""
+
+import os
+import tarfile
+import zipfile
+from collections import Counter
+from functools import partial
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+# Configuration
+BATCH_PREDICT_MAX_IMAGES = int(os.getenv("BATCH_PREDICT_MAX_IMAGES", "100"))
+BATCH_PREDICT_CHUNK_SIZE = int(os.getenv("BATCH_PREDICT_CHUNK_SIZE", "16"))
+BATCH_PREDICT_MAX_IMAGE_MB = float(os.getenv("BATCH_PREDICT_MAX_IMAGE_MB", "15"))
+# Archive bomb limits, per request: total unpacked bytes and entries across all archives
+BATCH_PREDICT_MAX_UNPACKED_MB = float(os.getenv("BATCH_PREDICT_MAX_UNPACKED_MB", "500"))
+BATCH_PREDICT_MAX_ARCHIVE_ENTRIES = int(os.getenv("BATCH_PREDICT_MAX_ARCHIVE_ENTRIES", "1000"))
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+
+class BatchInputError(ValueError):
+    """The batch upload is malformed or exceeds the batch limits"""
+
+
+def is_image_name(name: str) -> bool:
+    base = os.path.basename(name)
+    return name.lower().endswith(IMAGE_EXTENSIONS) and not base.startswith('.') and '__MACOSX' not in name
+
+
+def _read_zip_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo, max_bytes: int) -> bytes:
+    if info.file_size > max_bytes:
+        raise BatchInputError(f"{info.filename} is larger than {max_bytes // (1024 * 1024)} MB")
+    return archive.read(info)
+
+
+def _read_tar_member(archive: tarfile.TarFile, member: tarfile.TarInfo, max_bytes: int) -> bytes:
+    if member.size > max_bytes:
+        raise BatchInputError(f"{member.name} is larger than {max_bytes // (1024 * 1024)} MB")
+    return archive.extractfile(member).read()
+
+
+def archive_kind(source) -> str:
+    """'zip', 'tar' (any compression) or None for a binary file object"""
+    source.seek(0)
+    if zipfile.is_zipfile(source):
+        kind = "zip"
+    else:
+        source.seek(0)
+        kind = "tar" if tarfile.is_tarfile(source) else None
+    source.seek(0)
+    return kind
+
+
+def open_batch_items(uploads, max_images: int = BATCH_PREDICT_MAX_IMAGES,
+                     max_image_mb: float = BATCH_PREDICT_MAX_IMAGE_MB,
+                     max_unpacked_mb: float = BATCH_PREDICT_MAX_UNPACKED_MB,
+                     max_entries: int = BATCH_PREDICT_MAX_ARCHIVE_ENTRIES) -> List[Tuple[str, Callable]]:
+    """
+    List the images in a batch upload as (name, reader) pairs
+
+    `uploads` are FastAPI UploadFiles: images, or ZIP / tar(.gz) archives of
+    images. Readers are called lazily (archive members are only decompressed
+    when their chunk is processed) and return bytes or a file object. Archive
+    members larger than `max_image_mb` fail individually when read. Archives
+    that hold more than `max_entries` entries or unpack to more than
+    `max_unpacked_mb` (all archives together) are rejected while they are
+    listed, before a compression bomb is inflated.
+    """
+    max_bytes = int(max_image_mb * 1024 * 1024)
+    max_unpacked = int(max_unpacked_mb * 1024 * 1024)
+    unpacked = 0
+    entries = 0
+    items = []
+
+    def check_limits(name):
+        if entries > max_entries:
+            raise BatchInputError(f"{name} has too many entries; the limit is {max_entries} per request")
+        if unpacked > max_unpacked:
+            raise BatchInputError(f"{name} unpacks to more than {max_unpacked_mb:g} MB per request")
+
+    for upload in uploads:
+        source = upload.file
+        name = upload.filename or "upload"
+        kind = None
+        if not ((upload.content_type or "").startswith('image/') or is_image_name(name)):
+            kind = archive_kind(source)
+            if kind is None:
+                raise BatchInputError(f"{name} is not an image or a ZIP/tar archive of images")
+
+        if kind is None:
+            items.append((name, lambda source=source: source))
+
+        elif kind == "zip":
+            # The central directory lists every entry and its size without inflating anything
+            archive = zipfile.ZipFile(source)
+            for info in archive.infolist():
+                entries += 1
+                if not info.is_dir() and is_image_name(info.filename):
+                    unpacked += min(info.file_size, max_bytes)  # larger members fail unread
+                    items.append((info.filename, partial(_read_zip_member, archive, info, max_bytes)))
+                check_limits(name)
+
+        else:
+            # Reaching each tar header inflates everything before it, so the running total is
+            # checked before moving on (getmembers() would inflate the whole stream first)
+            archive = tarfile.open(fileobj=source)
+            archive_unpacked = 0
+            for member in archive:
+                entries += 1
+                unpacked += member.offset_data + member.size - archive_unpacked
+                archive_unpacked = member.offset_data + member.size
+                check_limits(name)
+                if member.isfile() and is_image_name(member.name):
+                    items.append((member.name, partial(_read_tar_member, archive, member, max_bytes)))
+
+    if not items:
+        raise BatchInputError("No images found in the upload")
+    if len(items) > max_images:
+        raise BatchInputError(f"Too many images ({len(items)}); the limit is {max_images} per request")
+    return items
+
+
+def is_healthy_class(class_name: str) -> bool:
+    return "healthy" in class_name.lower()
+
+
+def summarize_field(results: List[Dict[str, Any]], class_names: Dict[int, str],
+                    disease_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aggregate per-image predictions into a field-level diagnosis
+
+    `primary_disease` is the most frequently predicted disease (ties broken by
+    mean confidence), reported even when most leaves are healthy since a
+    partly infected field still needs treatment.
+    """
+    classified = [r for r in results if "prediction" in r]
+    counts = Counter(r["prediction"] for r in classified)
+
+    mean_probabilities = {}
+    if classified:
+        order = [class_names[idx] for idx in sorted(class_names)]
+        by_class = [{p["class"]: p["probability"] for p in r["all_predictions"]} for r in classified]
+        probabilities = np.array([[probs[name] for name in order] for probs in by_class])
+        mean_probabilities = dict(zip(order, probabilities.mean(axis=0).round(4).tolist()))
+
+    disease_counts = {name: count for name, count in counts.items() if not is_healthy_class(name)}
+    diseased = sum(disease_counts.values())
+
+    primary_disease = None
+    if disease_counts:
+        def mean_confidence(name):
+            return np.mean([r["confidence"] for r in classified if r["prediction"] == name])
+        primary_disease = max(disease_counts, key=lambda name: (disease_counts[name], mean_confidence(name)))
+
+    summary = {
+        "images": len(results),
+        "classified": len(classified),
+        "failed": len(results) - len(classified),
+        "class_counts": dict(counts.most_common()),
+        "mean_probabilities": mean_probabilities,
+        "diseased_images": diseased,
+        "diseased_fraction": round(diseased / len(classified), 4) if classified else None,
+        "diagnosis": primary_disease or ("Healthy" if classified else None),
+        "primary_disease": primary_disease,
+    }
+
+    if primary_disease is not None:
+        info = disease_info.get(primary_disease, {})
+        summary.update({
+            "si_name": info.get("si_name", primary_disease),
+            "severity": info.get("severity", "unknown"),
+            "treatment": info.get("treatment", []),
+        })
+    return summary
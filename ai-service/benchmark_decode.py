@@ -0,0 +1,121 @@
+"""
+Image Decode Benchmark
+Compares full-resolution decode + LANCZOS against the draft-mode decode used by the API
+"""
+
+import io
+import os
+import time
+import argparse
+import numpy as np
+from PIL import Image
+
+from preprocessing import IMAGE_SIZE, preprocess_image, decode_image
+
+DEFAULT_CORPUS = ["dataset/test", "tea_dataset/test", "chili_dataset/test"]
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def legacy_preprocess(image_bytes):
+    """Previous pipeline: decode every pixel, then LANCZOS down to the model size"""
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image = image.resize(IMAGE_SIZE, Image.Resampling.LANCZOS)
+    return np.expand_dims(np.array(image) / 255.0, axis=0), image
+
+
+def full_decode_pixels(image_bytes):
+    width, height = Image.open(io.BytesIO(image_bytes)).size
+    return width * height
+
+
+def draft_decode_pixels(image_bytes):
+    image = decode_image(image_bytes)
+    return image.width * image.height
+
+
+def load_corpus(paths, limit):
+    files = []
+    for root_path in paths:
+        for root, _, names in os.walk(root_path):
+            files.extend(os.path.join(root, n) for n in sorted(names) if n.lower().endswith(IMAGE_EXTENSIONS))
+    files = sorted(files)[:limit] if limit else sorted(files)
+
+    corpus = []
+    for path in files:
+        with open(path, 'rb') as f:
+            corpus.append(f.read())
+    return corpus
+
+
+def synthesize_phone_photos(corpus, megapixels, quality=90):
+    """Upscale and re-encode images as JPEGs of roughly `megapixels` (stand-in for a phone corpus)"""
+    photos = []
+    for image_bytes in corpus:
+        image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
+        scale = (megapixels * 1e6 / (image.width * image.height)) ** 0.5
+        image = image.resize((int(image.width * scale), int(image.height * scale)), Image.Resampling.BICUBIC)
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=quality)
+        photos.append(buffer.getvalue())
+    return photos
+
+
+def run(fn, pixels_fn, corpus):
+    latencies, pixels, outputs = [], [], []
+    for image_bytes in corpus:
+        start = time.perf_counter()
+        img_array, _ = fn(image_bytes)
+        latencies.append((time.perf_counter() - start) * 1000)
+        outputs.append(img_array)
+        pixels.append(pixels_fn(image_bytes))
+    return np.array(latencies), np.array(pixels), outputs
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", nargs="+", default=DEFAULT_CORPUS,
+                        help="Directories of photos (searched recursively)")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--synthesize-megapixels", type=float, default=None,
+                        help="Upscale the corpus to N-megapixel JPEGs first (if no phone photos are available)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.images, args.limit)
+    if not corpus:
+        print(f"⚠️ No images found in {args.images}")
+        return
+    if args.synthesize_megapixels:
+        corpus = synthesize_phone_photos(corpus, args.synthesize_megapixels)
+
+    sizes = [Image.open(io.BytesIO(b)).size for b in corpus]
+    print("=" * 60)
+    print("🖼️ Image Decode Benchmark")
+    print(f"   Images: {len(corpus)}, median size: {int(np.median([w for w, _ in sizes]))}x"
+          f"{int(np.median([h for _, h in sizes]))}, median file: {np.median([len(b) for b in corpus]) / 1024:.0f} KB")
+    print("=" * 60)
+
+    # Warm up (imports, libjpeg tables)
+    legacy_preprocess(corpus[0])
+    preprocess_image(corpus[0])
+
+    results = {
+        "full_decode_lanczos": run(legacy_preprocess, full_decode_pixels, corpus),
+        "draft_decode": run(preprocess_image, draft_decode_pixels, corpus),
+    }
+
+    for name, (latencies, pixels, _) in results.items():
+        print(f"   {name:20s} p50 {np.percentile(latencies, 50):8.2f} ms   p99 {np.percentile(latencies, 99):8.2f} ms"
+              f"   decoded {np.mean(pixels) * 3 / (1024 * 1024):7.2f} MB/image")
+
+    legacy_outputs = results["full_decode_lanczos"][2]
+    draft_outputs = results["draft_decode"][2]
+    diffs = [np.mean(np.abs(a - b)) for a, b in zip(legacy_outputs, draft_outputs)]
+    speedup = np.percentile(results["full_decode_lanczos"][0], 50) / np.percentile(results["draft_decode"][0], 50)
+    print(f"\n   📈 p50 speedup: {speedup:.2f}x")
+    print(f"   Mean abs pixel difference vs full decode: {np.mean(diffs) * 255:.2f} / 255")
+
+
+if __name__ == "__main__":
+    main_cli()
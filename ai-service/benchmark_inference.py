@@ -0,0 +1,83 @@
+"""
+Inference Latency Benchmark
+Compares Keras model.predict() against the compiled tf.function used by the API
+"""
+
+import os
+import time
+import argparse
+import numpy as np
+from tensorflow import keras
+
+from main import MODELS_CONFIG, IMAGE_SIZE, compile_inference_fn
+
+
+def measure(fn, iterations, warmup=5):
+    """Return per-call latencies in milliseconds"""
+    for _ in range(warmup):
+        fn()
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def summarize(latencies):
+    return {
+        "p50": float(np.percentile(latencies, 50)),
+        "p99": float(np.percentile(latencies, 99)),
+        "mean": float(np.mean(latencies)),
+    }
+
+
+def benchmark_crop(crop_type, iterations, batch_size):
+    config = MODELS_CONFIG[crop_type]
+    if not os.path.exists(config["model_path"]):
+        print(f"⚠️ {crop_type.title()} model not found at {config['model_path']} - skipping")
+        return None
+
+    model = keras.models.load_model(config["model_path"])
+    infer = compile_inference_fn(model)
+    images = np.random.rand(batch_size, *IMAGE_SIZE, 3).astype(np.float32)
+
+    paths = {
+        "keras_predict": lambda: model.predict(images, verbose=0),
+        "compiled_tf_function": lambda: infer(images).numpy(),
+    }
+
+    results = {}
+    for name, fn in paths.items():
+        results[name] = summarize(measure(fn, iterations))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--crops", nargs="+", default=list(MODELS_CONFIG.keys()))
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=1)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("⏱️ Inference Latency Benchmark")
+    print(f"   Batch size: {args.batch_size}, iterations: {args.iterations}")
+    print("=" * 60)
+
+    for crop_type in args.crops:
+        results = benchmark_crop(crop_type, args.iterations, args.batch_size)
+        if results is None:
+            continue
+
+        print(f"\n🌱 {crop_type.title()}")
+        for name, stats in results.items():
+            print(f"   {name:22s} p50 {stats['p50']:8.2f} ms   p99 {stats['p99']:8.2f} ms   mean {stats['mean']:8.2f} ms")
+
+        speedup = results["keras_predict"]["p50"] / results["compiled_tf_function"]["p50"]
+        print(f"   📈 p50 speedup: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
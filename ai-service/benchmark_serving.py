@@ -0,0 +1,174 @@
+"""
+Multi-worker Serving Benchmark
+Memory (RSS / PSS / private) and /predict throughput of serve.py pre-fork workers vs `uvicorn --workers`
+"""
+
+import io
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from PIL import Image
+
+MB = 1024 * 1024
+
+
+def process_tree(pid: int):
+    """pid and all of its descendants (Linux /proc)"""
+    pids = [pid]
+    for child in _children(pid):
+        pids.extend(process_tree(child))
+    return pids
+
+
+def _children(pid: int):
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(c) for c in f.read().split())
+    except OSError:
+        pass
+    return children
+
+
+def memory_usage(pid: int):
+    """(rss, pss, private) bytes for one process"""
+    usage = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[0].endswith(":"):
+                usage[parts[0][:-1]] = int(parts[1]) * 1024
+    private = usage.get("Private_Clean", 0) + usage.get("Private_Dirty", 0)
+    return usage.get("Rss", 0), usage.get("Pss", 0), private
+
+
+def make_image(size: int = 640) -> bytes:
+    pixels = (np.random.default_rng(0).random((size, size, 3)) * 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def start_server(mode: str, workers: int, port: int, crop: str):
+    env = {
+        **os.environ,
+        "PRELOAD_CROPS": crop,
+        # Every request must reach the model
+        "PREDICTION_CACHE_SIZE": "0",
+        "PREDICTION_CACHE_DIR": "",
+        "PHASH_INDEX_SIZE": "0",
+        "PYTHONWARNINGS": "ignore",
+        "TF_CPP_MIN_LOG_LEVEL": "2",
+    }
+    if mode == "prefork":
+        cmd = [sys.executable, "serve.py", "--workers", str(workers), "--port", str(port)]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "main:app", "--workers", str(workers),
+               "--port", str(port), "--log-level", "warning"]
+    return subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+
+
+def wait_until_ready(proc, url: str, image: bytes, crop: str, workers: int, timeout: float = 600):
+    """Wait until every worker has answered /predict (each loads its own model)"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited with status {proc.returncode}")
+        try:
+            if requests.get(f"{url}/ready", timeout=2).ok:
+                break
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+
+    # Load and warm up all workers, then let resident memory settle
+    with ThreadPoolExecutor(max_workers=workers * 2) as pool:
+        list(pool.map(lambda _: post_image(url, image, crop), range(workers * 8)))
+
+    previous = None
+    while time.time() < deadline:
+        tree = process_tree(proc.pid)
+        rss = sum(memory_usage(pid)[0] for pid in tree)
+        if previous is not None and abs(rss - previous) < 4 * MB:
+            return
+        previous = rss
+        time.sleep(2)
+
+
+def post_image(url: str, image: bytes, crop: str = "rice") -> bool:
+    response = requests.post(f"{url}/predict?crop_type={crop}",
+                             files={"file": ("leaf.jpg", image, "image/jpeg")}, timeout=120)
+    return response.status_code == 200
+
+
+def measure_throughput(url: str, image: bytes, crop: str, requests_total: int, concurrency: int):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        ok = sum(pool.map(lambda _: post_image(url, image, crop), range(requests_total)))
+    elapsed = time.perf_counter() - started
+    return ok / elapsed, requests_total - ok
+
+
+def benchmark(mode: str, workers: int, args, image: bytes):
+    url = f"http://127.0.0.1:{args.port}"
+    proc = start_server(mode, workers, args.port, args.crop)
+    try:
+        wait_until_ready(proc, url, image, args.crop, workers)
+        tree = process_tree(proc.pid)
+        usage = [memory_usage(pid) for pid in tree]
+        throughput, failed = measure_throughput(url, image, args.crop, args.requests, args.concurrency)
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=60)
+
+    # Serving processes: the largest `workers` processes (skips uvicorn's reloader/tracker helpers)
+    worker_usage = sorted(usage, key=lambda u: u[0], reverse=True)[:workers]
+    return {
+        "processes": len(tree),
+        "total_rss_mb": sum(u[0] for u in usage) / MB,
+        "total_pss_mb": sum(u[1] for u in usage) / MB,
+        "worker_rss_mb": np.mean([u[0] for u in worker_usage]) / MB,
+        "worker_private_mb": np.mean([u[2] for u in worker_usage]) / MB,
+        "throughput": throughput,
+        "failed": failed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--modes", nargs="+", choices=["prefork", "uvicorn"], default=["prefork", "uvicorn"])
+    parser.add_argument("--crop", default="rice")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🧪 Multi-worker Serving Benchmark")
+    print(f"   {args.requests} requests, concurrency {args.concurrency}, {os.cpu_count()} CPU(s)")
+    print("=" * 60)
+
+    image = make_image()
+    print(f"\n{'mode':8s} {'workers':>7s} {'total RSS':>10s} {'total PSS':>10s} "
+          f"{'RSS/worker':>11s} {'private/worker':>15s} {'req/s':>7s}")
+    for mode in args.modes:
+        for workers in args.workers:
+            r = benchmark(mode, workers, args, image)
+            print(f"{mode:8s} {workers:7d} {r['total_rss_mb']:8.0f}MB {r['total_pss_mb']:8.0f}MB "
+                  f"{r['worker_rss_mb']:9.0f}MB {r['worker_private_mb']:13.0f}MB {r['throughput']:7.1f}"
+                  + (f"  ({r['failed']} failed)" if r["failed"] else ""))
+    print("\n📝 PSS splits shared pages between processes; private/worker is what each extra worker costs.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Yield Prediction Benchmark
+Per-prediction cost of the columnar predict_many engine vs scalar predict() calls at several batch sizes
+"""
+
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from yield_predictor import YieldPredictor, FORECAST_SEASONS
+
+SCRIPT_DIR = Path(__file__).parent
+DATA_PATH = SCRIPT_DIR / "paddy_data" / "paddy_statistics.json"
+MODEL_PATH = SCRIPT_DIR / "models" / "yield_predictor.pkl"
+
+
+def make_queries(districts, size: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "district": rng.choice(districts, size),
+        "season": rng.choice(FORECAST_SEASONS, size),
+        "year": rng.integers(2020, 2031, size),
+    })
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def load_predictor(use_model: bool) -> YieldPredictor:
+    predictor = YieldPredictor()
+    if use_model and MODEL_PATH.exists():
+        predictor.load_model(MODEL_PATH)
+    predictor.load_data(DATA_PATH)
+    predictor.build_forecast_table()
+    return predictor
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--statistical", action="store_true", help="Benchmark without the trained model")
+    args = parser.parse_args()
+
+    predictor = load_predictor(not args.statistical)
+
+    print("=" * 60)
+    print("🌾 Yield Prediction Benchmark")
+    print(f"   Method: {'statistical' if predictor.model is None else 'ml_model'}, best of {args.repeat}")
+    print("=" * 60)
+    print(f"\n{'batch':>7s} {'predict() loop':>16s} {'predict_many':>14s} {'core, no table':>16s}   (µs / prediction)")
+
+    for size in args.sizes:
+        queries = make_queries(list(predictor.district_stats), size)
+        rows = list(queries.itertuples(index=False))
+        season_idx = (queries["season"] == "Yala").to_numpy().astype(np.intp)
+
+        scalar = best_of(lambda: [predictor.predict(r.district, r.season, r.year) for r in rows], args.repeat)
+        columnar = best_of(lambda: predictor.predict_many(queries), args.repeat)
+        # Feature building + model + adjustments for every row, bypassing the forecast table
+        core = best_of(lambda: predictor._forecast_cells(queries["district"].to_numpy(), season_idx,
+                                                         queries["year"].to_numpy()), args.repeat)
+
+        per_row = [t / size * 1e6 for t in (scalar, columnar, core)]
+        print(f"{size:7d} {per_row[0]:16.2f} {per_row[1]:14.2f} {per_row[2]:16.2f}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -1,15 +1,12 @@
 import os
-import joblib
+import threading
 import pandas as pd
 from typing import List, Dict, Any
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score
+
+from mapped_weights import get_pack_path, pack_is_current, map_forest_pipeline
 
 MODEL_PATH = os.path.join('models', 'crop_suitability.joblib')
+MAPPED_MODEL_PATH = get_pack_path(MODEL_PATH)
 SAMPLE_DATA_PATH = os.path.join('data', 'crop_suitability_samples.csv')
 
 CATEGORICAL = ['district', 'season', 'soil_type', 'drainage', 'slope']
@@ -18,8 +15,30 @@ BOOL = ['irrigation']
 TARGET = 'crop'
 
 
-def load_or_train_model() -> Pipeline:
+_model = None
+_model_lock = threading.Lock()
+
+
+def load_or_train_model():
   """Load existing model or train new one from data"""
+  # Prefer the memory-mapped export (python export_mapped_models.py) when it matches the saved model
+  if pack_is_current(MAPPED_MODEL_PATH, MODEL_PATH):
+    try:
+      model = map_forest_pipeline(MAPPED_MODEL_PATH)
+      print(f"✅ Mapped crop suitability model from {MAPPED_MODEL_PATH}")
+      return model
+    except Exception as e:
+      print(f"⚠️ Failed to map {MAPPED_MODEL_PATH}: {e}. Loading {MODEL_PATH}...")
+
+  # sklearn/joblib are only needed when the mapped export is missing or stale
+  import joblib
+  from sklearn.model_selection import train_test_split
+  from sklearn.preprocessing import OneHotEncoder
+  from sklearn.compose import ColumnTransformer
+  from sklearn.pipeline import Pipeline
+  from sklearn.ensemble import RandomForestClassifier
+  from sklearn.metrics import accuracy_score
+
   # Try load saved model
   if os.path.exists(MODEL_PATH):
     try:
@@ -83,7 +102,14 @@ def load_or_train_model() -> Pipeline:
   return pipe
 
 
-model = load_or_train_model()
+def get_model():
+  """The suitability model, loaded (or trained) on first use rather than at import"""
+  global _model
+  if _model is None:
+    with _model_lock:
+      if _model is None:
+        _model = load_or_train_model()
+  return _model
 
 
 def predict_suitability(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -99,6 +125,7 @@ def predict_suitability(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
   df['irrigation'] = df['irrigation'].astype(bool)
 
   # Get predictions with probabilities
+  model = get_model()
   proba = model.predict_proba(df)[0]
   classes = list(model.classes_)
   
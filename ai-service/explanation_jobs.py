@@ -0,0 +1,225 @@
+"""
+Asynchronous Grad-CAM Explanation Jobs
+Background worker queue for explanations, with results held in a TTL cache
+"""
+
+import os
+import re
+import time
+import uuid
+import pickle
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Configuration
+EXPLAIN_TTL_SECONDS = int(os.getenv("EXPLAIN_TTL_SECONDS", "300"))
+EXPLAIN_QUEUE_SIZE = int(os.getenv("EXPLAIN_QUEUE_SIZE", "64"))
+EXPLAIN_WORKERS = int(os.getenv("EXPLAIN_WORKERS", "2"))
+EXPLAIN_MAX_RESULTS = int(os.getenv("EXPLAIN_MAX_RESULTS", "1000"))
+# Directory shared by pre-forked workers so any worker can answer GET /explain/{id} (empty = off)
+EXPLAIN_SHARED_DIR = os.getenv("EXPLAIN_SHARED_DIR", "")
+
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+class TTLCache:
+    """Insertion-ordered dict whose entries expire after `ttl` seconds"""
+
+    def __init__(self, ttl: float = EXPLAIN_TTL_SECONDS, max_entries: int = EXPLAIN_MAX_RESULTS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._purge()
+
+    def update(self, key: str, **fields):
+        """Merge fields into a dict value without resetting its expiry"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                item[1].update(fields)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self._items[key]
+                return None
+            return item[1]
+
+    def _purge(self):
+        now = time.monotonic()
+        while self._items:
+            key, (expires, _) = next(iter(self._items.items()))
+            if expires >= now and len(self._items) <= self.max_entries:
+                break
+            del self._items[key]
+
+    def __len__(self):
+        return len(self._items)
+
+
+class ExplanationQueueFull(Exception):
+    """Raised when the background explanation queue cannot take more jobs"""
+
+
+class ExplanationJobs:
+    """
+    Runs explanation coroutines on background workers
+
+    `submit()` returns an ID immediately; the job's result (or error) is stored
+    in a TTL cache and can be polled with `get()` until it expires. With
+    `shared_dir` set, every state change is also written there (one pickle per
+    job), so a job can be polled from any process serving the API.
+    """
+
+    def __init__(self, ttl: float = EXPLAIN_TTL_SECONDS, queue_size: int = EXPLAIN_QUEUE_SIZE,
+                 workers: int = EXPLAIN_WORKERS, shared_dir: str = EXPLAIN_SHARED_DIR):
+        self.results = TTLCache(ttl)
+        self.shared_dir = shared_dir or None
+        if self.shared_dir:
+            os.makedirs(self.shared_dir, exist_ok=True)
+        self._published = 0
+        self.queue_size = queue_size
+        self.num_workers = max(int(workers), 1)
+        self._queue = None
+        self._workers = []
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def submit(self, job: Callable[[], Awaitable[Any]]) -> str:
+        """Queue a job (a zero-argument coroutine function) and return its ID"""
+        self._ensure_workers()
+        job_id = uuid.uuid4().hex
+        try:
+            self._queue.put_nowait((job_id, job))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise ExplanationQueueFull("Explanation queue is full")
+
+        self.results.set(job_id, {"status": "pending", "created_at": time.time()})
+        self._publish(job_id)
+        self.submitted += 1
+        return job_id
+
+    def put(self, result: Any) -> str:
+        """Store an already computed result (e.g. a synchronous explanation) and return its ID"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self.results.set(job_id, {"status": "done", "created_at": now, "result": result, "finished_at": now})
+        self._publish(job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.results.get(job_id)
+        if job is None and self.shared_dir and JOB_ID_PATTERN.fullmatch(job_id):
+            job = self._read_shared(job_id)
+        return job
+
+    def _shared_path(self, job_id: str) -> str:
+        return os.path.join(self.shared_dir, f"{job_id}.pkl")
+
+    def _publish(self, job_id: str):
+        """Write the job's current state to the shared directory (atomic replace)"""
+        if not self.shared_dir:
+            return
+        job = self.results.get(job_id)
+        if job is None:
+            return
+
+        path = self._shared_path(job_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(job, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Could not share explanation {job_id}: {e}")
+
+        self._published += 1
+        if self._published % 64 == 0:
+            self._purge_shared()
+
+    def _read_shared(self, job_id: str) -> Optional[Dict[str, Any]]:
+        path = self._shared_path(job_id)
+        try:
+            if os.path.getmtime(path) + self.results.ttl < time.time():
+                return None
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _purge_shared(self):
+        """Delete shared job files older than the TTL"""
+        expired_before = time.time() - self.results.ttl
+        try:
+            entries = list(os.scandir(self.shared_dir))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.name.endswith(".pkl") and entry.stat().st_mtime < expired_before:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [w for w in self._workers if not w.done()]
+        loop = asyncio.get_running_loop()
+        while len(self._workers) < self.num_workers:
+            self._workers.append(loop.create_task(self._run()))
+
+    async def _run(self):
+        while True:
+            job_id, job = await self._queue.get()
+            if self.results.get(job_id) is None:
+                continue  # expired while queued
+
+            self.results.update(job_id, status="running")
+            try:
+                result = await job()
+                self.results.update(job_id, status="done", result=result, finished_at=time.time())
+                self.completed += 1
+            except Exception as e:
+                self.results.update(job_id, status="failed", error=str(e), finished_at=time.time())
+                self.failed += 1
+            self._publish(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.num_workers,
+            "queue_size": self.queue_size,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "cached_results": len(self.results),
+            "ttl_seconds": self.results.ttl,
+            "shared_dir": self.shared_dir,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        for worker in self._workers:
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        self._workers = []
@@ -0,0 +1,89 @@
+"""
+Export Models to Memory-mapped Weight Packs
+Writes page-aligned .mmap.bin/.mmap.json packs for the crop suitability and yield models
+"""
+
+import os
+import time
+import argparse
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from main import load_yield_predictor
+from mapped_weights import get_pack_path, export_forest_pipeline, map_forest_pipeline, MappedGradientBoostingRegressor
+from crop_suitability_model import MODEL_PATH as SUITABILITY_MODEL_PATH, SAMPLE_DATA_PATH
+from yield_predictor import YieldPredictor
+
+YIELD_MODEL_PATH = Path(__file__).parent / "models" / "yield_predictor.pkl"
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def report(name, pack_path, bin_size, load_ms, map_ms, max_diff):
+    print(f"   ✅ {name}: {pack_path} ({bin_size / (1024 * 1024):.2f} MB)")
+    print(f"      load {load_ms:8.1f} ms -> map {map_ms:8.1f} ms   max |diff| {max_diff:.2e}")
+
+
+def export_suitability():
+    if not os.path.exists(SUITABILITY_MODEL_PATH):
+        print(f"⚠️ Crop suitability model not found at {SUITABILITY_MODEL_PATH} - skipping")
+        return None
+
+    pipe, load_ms = timed(joblib.load, SUITABILITY_MODEL_PATH)
+    pack_path = get_pack_path(SUITABILITY_MODEL_PATH)
+    bin_size = export_forest_pipeline(pipe, pack_path, SUITABILITY_MODEL_PATH)
+
+    mapped, map_ms = timed(map_forest_pipeline, pack_path)
+    max_diff = 0.0
+    if os.path.exists(SAMPLE_DATA_PATH):
+        df = pd.read_csv(SAMPLE_DATA_PATH)
+        df['irrigation'] = df['irrigation'].astype(bool)
+        max_diff = np.abs(pipe.predict_proba(df) - mapped.predict_proba(df)).max()
+    report("crop suitability", pack_path, bin_size, load_ms, map_ms, max_diff)
+
+
+def export_yield():
+    if not YIELD_MODEL_PATH.exists():
+        print(f"⚠️ Yield model not found at {YIELD_MODEL_PATH} - skipping")
+        return None
+
+    predictor = YieldPredictor()
+    predictor.load_model(YIELD_MODEL_PATH)
+    pack_path = get_pack_path(YIELD_MODEL_PATH)
+    bin_size = predictor.save_mapped_model(pack_path, YIELD_MODEL_PATH)
+
+    # Both sides go through main.load_yield_predictor, the path the service uses
+    # (model, historical data, forecast table), so a pack that cannot serve fails here
+    baseline, load_ms = timed(load_yield_predictor, YIELD_MODEL_PATH, None, False)
+    mapped, map_ms = timed(load_yield_predictor, YIELD_MODEL_PATH)
+    if not isinstance(mapped.model, MappedGradientBoostingRegressor):
+        raise RuntimeError(f"{pack_path} was not picked up by load_yield_predictor")
+    diffs = [
+        abs(baseline.predict(district, season, 2025)['predicted_yield_kg_ha']
+            - mapped.predict(district, season, 2025)['predicted_yield_kg_ha'])
+        for district in baseline.features.districts for season in baseline.features.seasons
+    ]
+    report("yield predictor", pack_path, bin_size, load_ms, map_ms, max(diffs))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.parse_args()
+
+    print("=" * 60)
+    print("📦 Memory-mapped Weight Export")
+    print("=" * 60)
+
+    export_suitability()
+    export_yield()
+
+
+if __name__ == "__main__":
+    main_cli()
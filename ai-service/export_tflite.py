@@ -0,0 +1,175 @@
+"""
+Export Crop Disease Models to TFLite (float16 and int8)
+Calibrates int8 on dataset/valid and reports accuracy/latency deltas against Keras on dataset/test
+"""
+
+import os
+import json
+import time
+import random
+import argparse
+import numpy as np
+
+import main
+from main import MODELS_CONFIG, compile_inference_fn
+from preprocessing import IMAGE_SIZE, preprocess_image
+from tflite_backend import TFLITE_PRECISIONS, TFLiteInterpreterPool, convert_to_tflite, get_tflite_path
+
+DATASET_PATHS = {
+    "rice": "dataset",
+    "tea": "tea_dataset",
+    "chili": "chili_dataset"
+}
+REPORT_PATH = "models/tflite_report.json"
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def list_images(split_dir, class_names=None):
+    """Return [(path, class_idx)] for every image under split_dir/<class>/"""
+    name_to_idx = {name: idx for idx, name in (class_names or {}).items()}
+    samples = []
+    if not os.path.isdir(split_dir):
+        return samples
+
+    for class_dir in sorted(os.listdir(split_dir)):
+        full_dir = os.path.join(split_dir, class_dir)
+        if not os.path.isdir(full_dir):
+            continue
+        for img_name in sorted(os.listdir(full_dir)):
+            if img_name.lower().endswith(IMAGE_EXTENSIONS):
+                samples.append((os.path.join(full_dir, img_name), name_to_idx.get(class_dir, -1)))
+    return samples
+
+
+def load_images(samples):
+    """Preprocess images exactly as the API does, straight into one float32 array"""
+    images = np.empty((len(samples), *IMAGE_SIZE, 3), dtype=np.float32)
+    for (path, _), row in zip(samples, images):
+        with open(path, 'rb') as f:
+            preprocess_image(f.read(), out=row)
+    return images
+
+
+def evaluate(predict_fn, images, labels, batch_size=32):
+    """Top-1 accuracy of a numpy -> numpy predict function"""
+    if len(images) == 0:
+        return None
+    predicted = []
+    for start in range(0, len(images), batch_size):
+        predicted.append(np.argmax(predict_fn(images[start:start + batch_size]), axis=1))
+    return float(np.mean(np.concatenate(predicted) == labels))
+
+
+def latency_p50(predict_fn, image, iterations=50):
+    batch = np.expand_dims(image, axis=0)
+    for _ in range(5):
+        predict_fn(batch)
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        predict_fn(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(timings, 50))
+
+
+def export_crop(crop_type, representative_samples, max_test_images):
+    config = MODELS_CONFIG[crop_type]
+    print(f"\n🔄 Exporting {crop_type} model...")
+
+    entry = main.model_registry.get(crop_type)
+    if entry is None:
+        print(f"⚠️ Skipping {crop_type}: model not available")
+        return None
+
+    model, _ = entry.explainer()
+    infer = compile_inference_fn(model)
+    keras_predict = lambda batch: infer(batch).numpy()
+
+    dataset_path = DATASET_PATHS[crop_type]
+    valid_samples = list_images(os.path.join(dataset_path, "valid"))
+    random.shuffle(valid_samples)
+    representative_images = load_images(valid_samples[:representative_samples])
+    print(f"   Calibration images: {len(representative_images)} from {dataset_path}/valid")
+
+    test_samples = list_images(os.path.join(dataset_path, "test"), main.model_registry.metadata(crop_type)["class_names"])
+    test_samples = [s for s in test_samples if s[1] >= 0]
+    if max_test_images:
+        random.shuffle(test_samples)
+        test_samples = test_samples[:max_test_images]
+    test_images = load_images(test_samples)
+    test_labels = np.array([label for _, label in test_samples])
+    print(f"   Test images: {len(test_images)} from {dataset_path}/test")
+
+    sample_image = test_images[0] if len(test_images) else np.zeros((*IMAGE_SIZE, 3), dtype=np.float32)
+    keras_accuracy = evaluate(keras_predict, test_images, test_labels)
+    report = {
+        "keras": {
+            "accuracy": keras_accuracy,
+            "size_mb": round(os.path.getsize(config["model_path"]) / (1024 * 1024), 2),
+            "latency_p50_ms": latency_p50(keras_predict, sample_image),
+        }
+    }
+
+    for precision in TFLITE_PRECISIONS:
+        if precision == "int8" and len(representative_images) == 0:
+            print("   ⚠️ No calibration images found - skipping int8")
+            continue
+
+        tflite_model = convert_to_tflite(infer, model, precision, representative_images)
+        tflite_path = get_tflite_path(config["model_path"], precision)
+        with open(tflite_path, 'wb') as f:
+            f.write(tflite_model)
+
+        pool = TFLiteInterpreterPool(tflite_path, size=1, batch_sizes=(1, 32))
+        accuracy = evaluate(pool.predict, test_images, test_labels)
+        report[precision] = {
+            "path": tflite_path,
+            "accuracy": accuracy,
+            "accuracy_delta": (accuracy - keras_accuracy) if accuracy is not None and keras_accuracy is not None else None,
+            "size_mb": pool.info()["model_size_mb"],
+            "latency_p50_ms": latency_p50(pool.predict, sample_image),
+        }
+        print(f"   ✅ {precision}: {tflite_path} ({report[precision]['size_mb']} MB)")
+
+    return report
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--crops", nargs="+", default=list(MODELS_CONFIG.keys()))
+    parser.add_argument("--representative-samples", type=int, default=200)
+    parser.add_argument("--max-test-images", type=int, default=None)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("📦 TFLite Export")
+    print("=" * 60)
+
+    random.seed(42)
+    reports = {}
+    for crop_type in args.crops:
+        report = export_crop(crop_type, args.representative_samples, args.max_test_images)
+        if report is not None:
+            reports[crop_type] = report
+
+    print("\n" + "=" * 60)
+    print("📊 Accuracy / Latency vs Keras (test split)")
+    print("=" * 60)
+    for crop_type, report in reports.items():
+        keras_report = report["keras"]
+        print(f"\n🌱 {crop_type.title()}")
+        for name, stats in report.items():
+            accuracy = f"{stats['accuracy'] * 100:.2f}%" if stats["accuracy"] is not None else "n/a"
+            delta = stats.get("accuracy_delta")
+            delta_text = f" ({delta * 100:+.2f} pts)" if delta is not None else ""
+            speedup = keras_report["latency_p50_ms"] / stats["latency_p50_ms"]
+            print(f"   {name:8s} acc {accuracy}{delta_text}   p50 {stats['latency_p50_ms']:.2f} ms "
+                  f"({speedup:.2f}x)   {stats['size_mb']} MB")
+
+    with open(REPORT_PATH, 'w') as f:
+        json.dump(reports, f, indent=2)
+    print(f"\n💾 Report saved to {REPORT_PATH}")
+
+
+if __name__ == "__main__":
+    main_cli()
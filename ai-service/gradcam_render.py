@@ -0,0 +1,119 @@
+"""
+Grad-CAM Rendering
+Colourises heatmaps and encodes explanations as base64 PNG, binary WebP/JPEG/PNG or raw float16
+"""
+
+import io
+import os
+import base64
+from functools import lru_cache
+from typing import Any, Dict
+
+import numpy as np
+from PIL import Image
+
+from preprocessing import IMAGE_SIZE
+
+# Configuration
+EXPLAIN_IMAGE_QUALITY = int(os.getenv("EXPLAIN_IMAGE_QUALITY", "80"))  # WebP/JPEG quality (1-100)
+
+# File extension -> (PIL format, media type)
+IMAGE_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpg": ("JPEG", "image/jpeg"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "png": ("PNG", "image/png"),
+}
+
+
+OVERLAY_ALPHA = 0.4
+
+
+@lru_cache(maxsize=1)
+def jet_lut() -> np.ndarray:
+    """JET colormap as an RGB lookup table, built once (no per-call BGR -> RGB conversion)"""
+    import cv2
+    return cv2.applyColorMap(np.arange(256, dtype=np.uint8).reshape(256, 1), cv2.COLORMAP_JET)[:, 0, ::-1].copy()
+
+
+def colorize_heatmap(heatmap, size=IMAGE_SIZE):
+    """Resize a [0, 1] heatmap and map it through the JET lookup table (uint8 RGB)"""
+    import cv2
+    heatmap_resized = cv2.resize(np.asarray(heatmap, dtype=np.float32), size)
+    indices = np.multiply(heatmap_resized, 255, out=heatmap_resized).astype(np.uint8)
+    return jet_lut()[indices]
+
+
+def blend_overlay(img_array, heatmap_colored, alpha=OVERLAY_ALPHA):
+    """img * (1 - alpha) + heatmap * alpha in uint16 fixed point (8 fractional bits)"""
+    weight = int(round(alpha * 256))
+    blended = img_array.astype(np.uint16)
+    blended *= 256 - weight
+    blended += np.multiply(heatmap_colored, weight, dtype=np.uint16)
+    blended >>= 8
+    return blended.astype(np.uint8)
+
+
+def render_explanation(original_image, heatmap, alpha=OVERLAY_ALPHA):
+    """
+    Colourise a heatmap once and produce both explanation images (uint8 RGB)
+
+    Returns (overlay, heatmap_image). The resized, colourised heatmap is shared
+    between the two whenever the original image is already IMAGE_SIZE (always
+    the case for preprocessed uploads).
+    """
+    img_array = np.asarray(original_image)
+    image_size = (img_array.shape[1], img_array.shape[0])
+
+    heatmap_colored = colorize_heatmap(heatmap, image_size)
+    overlay = blend_overlay(img_array, heatmap_colored, alpha)
+    if image_size != IMAGE_SIZE:
+        heatmap_colored = colorize_heatmap(heatmap, IMAGE_SIZE)
+    return overlay, heatmap_colored
+
+
+def encode_image(pixels, fmt: str = "png", quality: int = EXPLAIN_IMAGE_QUALITY) -> bytes:
+    """Encode a uint8 RGB array as PNG, WebP or JPEG bytes"""
+    pil_format, _ = IMAGE_FORMATS[fmt]
+    buffer = io.BytesIO()
+    if pil_format == "PNG":
+        Image.fromarray(pixels).save(buffer, format=pil_format)
+    else:
+        Image.fromarray(pixels).save(buffer, format=pil_format, quality=quality)
+    return buffer.getvalue()
+
+
+def to_base64(data: bytes) -> str:
+    return base64.b64encode(data).decode('utf-8')
+
+
+def render_gradcam(original_image, heatmap):
+    """Render Grad-CAM overlay and heatmap images as base64 PNG (blocking - run on the executor)"""
+    if heatmap is None:
+        return None
+
+    overlay, heatmap_image = render_explanation(original_image, heatmap)
+    return {
+        "overlay": to_base64(encode_image(overlay, "png")),
+        "heatmap": to_base64(encode_image(heatmap_image, "png"))
+    }
+
+
+def render_explanation_image(kind: str, original_image, heatmap, fmt: str,
+                             quality: int = EXPLAIN_IMAGE_QUALITY) -> bytes:
+    """Encode the overlay or the standalone heatmap as a binary image"""
+    if kind == "overlay":
+        pixels, _ = render_explanation(original_image, heatmap)
+    else:
+        pixels = colorize_heatmap(heatmap)
+    return encode_image(pixels, fmt, quality)
+
+
+def encode_heatmap_raw(heatmap) -> Dict[str, Any]:
+    """Raw heatmap as little-endian float16 (e.g. 7x7 -> 98 bytes) for client-side colourising"""
+    data = np.asarray(heatmap, dtype='<f2')
+    return {
+        "shape": list(data.shape),
+        "dtype": "float16",
+        "data": base64.b64encode(data.tobytes()).decode('ascii'),
+    }
@@ -0,0 +1,158 @@
+"""
+Dynamic Micro-Batching for Crop Disease Inference
+Collects concurrent /predict requests per crop into a single batched forward pass
+"""
+
+import os
+import time
+import asyncio
+from collections import Counter
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+# Configuration - tune under load via environment
+BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", "10"))
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "16"))
+
+
+class MicroBatcher:
+    """
+    Per-crop batching scheduler
+
+    Requests submitted within `window_ms` of the first queued request (or until
+    `max_batch_size` is reached) are stacked and run through `run_batch` once.
+    Each awaiting coroutine receives its own row of the batched output.
+    The forward pass runs on `executor` (the loop's default pool if None).
+    Batches run one at a time, so inputs are stacked into a single reused
+    buffer; `run_batch` must not keep a reference to its input.
+    """
+
+    def __init__(self, name: str, run_batch: Callable[[np.ndarray], np.ndarray],
+                 window_ms: float = BATCH_WINDOW_MS, max_batch_size: int = BATCH_MAX_SIZE,
+                 executor: Optional[Executor] = None):
+        self.name = name
+        self.run_batch = run_batch
+        self.executor = executor
+        self.window = max(window_ms, 0) / 1000.0
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self._queue = None
+        self._worker = None
+        self._buffer = None
+
+        # Metrics
+        self.batch_sizes = Counter()
+        self.queue_depths = Counter()
+        self.requests = 0
+        self.dispatched = 0  # requests actually sent to the model (not cancelled before dispatch)
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.total_wait_ms = 0.0
+        self.total_run_ms = 0.0
+
+    async def submit(self, item: np.ndarray) -> np.ndarray:
+        """Queue a single (unbatched) input and wait for its prediction"""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future, time.perf_counter()))
+        self.requests += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _collect(self):
+        """Wait for the first request, then gather more until the window closes"""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Drop requests whose callers have gone away (client disconnects)
+            batch = [entry for entry in batch if not entry[1].cancelled()]
+            if not batch:
+                continue
+
+            # Anything that fails from here on fails this batch's requests, never the worker
+            started = time.perf_counter()
+            try:
+                inputs = self._stack([item for item, _, _ in batch])
+
+                self.queue_depths[self._queue.qsize()] += 1
+                self.batch_sizes[len(batch)] += 1
+                self.batches += 1
+                self.dispatched += len(batch)
+                self.total_wait_ms += sum(started - queued for _, _, queued in batch) * 1000
+
+                outputs = await loop.run_in_executor(self.executor, self.run_batch, inputs)
+                if len(outputs) != len(batch):
+                    raise RuntimeError(f"{self.name} batch returned {len(outputs)} outputs for {len(batch)} inputs")
+                for (_, future, _), output in zip(batch, outputs):
+                    if not future.done():
+                        future.set_result(output)
+            except asyncio.CancelledError:
+                for _, future, _ in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                self.total_run_ms += (time.perf_counter() - started) * 1000
+
+    def _stack(self, items):
+        """Stack inputs into the preallocated batch buffer (reallocated if the input shape changes)"""
+        first = items[0]
+        if self._buffer is None or self._buffer.shape[1:] != first.shape or self._buffer.dtype != first.dtype:
+            self._buffer = np.empty((self.max_batch_size, *first.shape), dtype=first.dtype)
+        return np.stack(items, out=self._buffer[:len(items)])
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and batch-size histograms for tuning"""
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "requests": self.requests,
+            "batches": self.batches,
+            "dispatched": self.dispatched,
+            "avg_batch_size": round(self.dispatched / self.batches, 2) if self.batches else 0,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_wait_ms": round(self.total_wait_ms / self.dispatched, 2) if self.dispatched else 0,
+            "avg_batch_run_ms": round(self.total_run_ms / self.batches, 2) if self.batches else 0,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+            "queue_depth_histogram": dict(sorted(self.queue_depths.items())),
+        }
+
+    async def close(self):
+        """Stop the background worker"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
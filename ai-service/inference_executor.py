@@ -0,0 +1,84 @@
+"""
+Bounded Executor Stage for CPU-bound Inference Work
+Keeps JPEG decoding, TensorFlow inference, Grad-CAM and PNG encoding off the asyncio event loop
+"""
+
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+# Configuration - concurrency and backpressure
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "32"))
+INFERENCE_RETRY_AFTER = int(os.getenv("INFERENCE_RETRY_AFTER", "2"))
+
+
+class ExecutorSaturated(Exception):
+    """Raised when no more inference requests can be admitted"""
+
+    def __init__(self, retry_after: int = INFERENCE_RETRY_AFTER):
+        super().__init__("Inference queue is full")
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """
+    Thread pool with request admission control
+
+    TensorFlow, PIL and OpenCV release the GIL in their heavy kernels, so a
+    thread pool lets models stay loaded once and shared by every worker thread.
+    At most `max_workers + max_queue` requests are admitted at a time; beyond
+    that `admit()` raises ExecutorSaturated so callers can shed load early.
+    """
+
+    def __init__(self, max_workers: int = INFERENCE_WORKERS, max_queue: int = INFERENCE_QUEUE_SIZE,
+                 retry_after: int = INFERENCE_RETRY_AFTER):
+        self.max_workers = max(int(max_workers), 1)
+        self.max_queue = max(int(max_queue), 0)
+        self.retry_after = retry_after
+        self.pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.max_in_flight = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @contextmanager
+    def admit(self):
+        """Reserve a slot for one request, or raise ExecutorSaturated"""
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise ExecutorSaturated(self.retry_after)
+
+        self.in_flight += 1
+        self.admitted += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking function on the pool and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, functools.partial(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "queue_size": self.max_queue,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -5,21 +5,37 @@ Supports Rice and Tea Leaf Disease Detection
 """
 
 import os
-import io
 import json
-import base64
+import asyncio
+import tarfile
+import zipfile
+from contextlib import ExitStack
+from typing import List, Optional
 import numpy as np
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras import layers
 from PIL import Image
-import cv2
 from fastapi import FastAPI, File, UploadFile, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from pydantic import BaseModel
 import uvicorn
 from enum import Enum
-from crop_suitability_model import predict_suitability
+from startup_profile import startup_profile
+from inference_batcher import MicroBatcher, BATCH_MAX_SIZE
+from inference_executor import InferenceExecutor, ExecutorSaturated
+from model_registry import ModelRegistry, CropModel, PRELOAD_CROPS
+from explanation_jobs import ExplanationJobs, ExplanationQueueFull
+from prediction_cache import PredictionCache, hash_upload, make_cache_key
+from perceptual_hash import NearDuplicateIndex, dhash
+from preprocessing import IMAGE_SIZE, ImageTooLarge, preprocess_image
+from upload_limits import UploadLimitMiddleware, InflightBytes, MAX_BATCH_UPLOAD_MB
+from gradcam_render import (
+    IMAGE_FORMATS, EXPLAIN_IMAGE_QUALITY, render_gradcam, render_explanation_image, encode_heatmap_raw
+)
+from batch_predict import BATCH_PREDICT_CHUNK_SIZE, BatchInputError, open_batch_items, summarize_field
+from mapped_weights import get_pack_path, pack_is_current
+from model_warmup import (
+    SUITABILITY_WARMUP_PAYLOAD, YIELD_WARMUP_AREA_HA, get_warmup_batch_sizes, make_warmup_batch, yield_warmup_query
+)
 
 # Configuration - Multi-crop support
 MODELS_CONFIG = {
@@ -39,7 +55,9 @@ MODELS_CONFIG = {
         "disease_info_path": "models/chili/chili_disease_info.json"
     }
 }
-IMAGE_SIZE = (224, 224)
+
+# Inference backend: "keras" (compiled tf.function) or "tflite" (run export_tflite.py first)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "keras").lower()
 
 # Crop type enum
 class CropType(str, Enum):
@@ -47,6 +65,19 @@ class CropType(str, Enum):
     tea = "tea"
     chili = "chili"
 
+# Grad-CAM explanation mode for /predict
+class ExplainMode(str, Enum):
+    none = "none"
+    sync = "sync"
+    async_ = "async"
+
+# How Grad-CAM is returned: inline base64 PNG, binary image URLs, or raw float16 heatmap
+class GradcamFormat(str, Enum):
+    png = "png"
+    webp = "webp"
+    jpeg = "jpeg"
+    raw = "raw"
+
 # Initialize FastAPI
 app = FastAPI(
     title="Govi Isuru - Multi-Crop Disease Predictor",
@@ -54,6 +85,11 @@ app = FastAPI(
     version="3.1.0"
 )
 
+# Request body limits: 413 for oversize uploads, 503 when too many bytes are in flight
+upload_budget = InflightBytes()
+app.add_middleware(UploadLimitMiddleware, budget=upload_budget,
+                   path_limits_mb={"/predict/batch": MAX_BATCH_UPLOAD_MB})
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -69,186 +105,372 @@ app.add_middleware(
 @app.post("/suitability/predict")
 def suitability_predict(payload: dict):
     try:
+        from crop_suitability_model import predict_suitability
         recs = predict_suitability(payload)
         return {"recommendations": recs, "inputs": payload}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# Global variables for models and metadata (multi-crop)
-models = {}
-class_indices = {}
-class_names = {}
-disease_info = {}
-
-def load_crop_model(crop_type: str):
-    """Load model and metadata for a specific crop type"""
-    global models, class_indices, class_names, disease_info
+def compile_inference_fn(model):
+    """
+    Wrap a Keras model in a tf.function with a fixed (None, 224, 224, 3) float32 signature
+    Traced once, so each call is just graph execution (no Keras predict() data-adapter overhead)
+    """
+    import tensorflow as tf
     
+    @tf.function(input_signature=[tf.TensorSpec(shape=(None, *IMAGE_SIZE, 3), dtype=tf.float32)])
+    def infer(images):
+        return model(images, training=False)
+    
+    # Warm up: trigger tracing and kernel selection before serving traffic
+    infer(tf.zeros((1, *IMAGE_SIZE, 3), dtype=tf.float32))
+    return infer
+
+def load_tflite_pool(crop_type: str, batch_sizes):
+    """The crop's TFLite interpreter pool (one set per batch size), or None when it was not exported"""
+    from tflite_backend import TFLiteInterpreterPool, get_tflite_path
+    tflite_path = get_tflite_path(MODELS_CONFIG[crop_type]["model_path"])
+    if os.path.exists(tflite_path):
+        return TFLiteInterpreterPool(tflite_path, batch_sizes=batch_sizes)
+    print(f"⚠️ {crop_type.title()} TFLite model not found at {tflite_path}, falling back to Keras")
+    return None
+
+def load_crop_metadata(crop_type: str):
+    """Load class indices and disease info for a specific crop type"""
     config = MODELS_CONFIG.get(crop_type)
     if not config:
         print(f"⚠️ Unknown crop type: {crop_type}")
-        return False
-    
-    print(f"\n🔄 Loading {crop_type} model and metadata...")
-    
-    # Load model
-    if os.path.exists(config["model_path"]):
-        models[crop_type] = keras.models.load_model(config["model_path"])
-        print(f"✅ {crop_type.title()} model loaded from {config['model_path']}")
-    else:
-        print(f"⚠️ {crop_type.title()} model not found at {config['model_path']}")
-        return False
+        return None
     
     # Load class indices
     if os.path.exists(config["class_indices_path"]):
         with open(config["class_indices_path"], 'r') as f:
-            class_indices[crop_type] = json.load(f)
+            crop_class_indices = json.load(f)
         
         # Handle both formats: {"class_name": 0} or {"0": "class_name"}
-        first_key = next(iter(class_indices[crop_type].keys()))
+        first_key = next(iter(crop_class_indices.keys()))
         if first_key.isdigit():
             # Format: {"0": "class_name"} - already correct
-            class_names[crop_type] = {int(k): v for k, v in class_indices[crop_type].items()}
+            crop_class_names = {int(k): v for k, v in crop_class_indices.items()}
         else:
             # Format: {"class_name": 0} - need to swap
-            class_names[crop_type] = {v: k for k, v in class_indices[crop_type].items()}
+            crop_class_names = {v: k for k, v in crop_class_indices.items()}
         
-        print(f"✅ {crop_type.title()} class indices loaded: {list(class_names[crop_type].values())}")
+        print(f"✅ {crop_type.title()} class indices loaded: {list(crop_class_names.values())}")
     else:
         print(f"⚠️ {crop_type.title()} class indices not found")
-        return False
+        return None
     
     # Load disease info
     if os.path.exists(config["disease_info_path"]):
         with open(config["disease_info_path"], 'r', encoding='utf-8') as f:
-            disease_info[crop_type] = json.load(f)
+            crop_disease_info = json.load(f)
         print(f"✅ {crop_type.title()} disease info loaded")
     else:
         print(f"⚠️ {crop_type.title()} disease info not found, using defaults")
-        disease_info[crop_type] = {}
+        crop_disease_info = {}
     
-    return True
+    return {
+        "class_indices": crop_class_indices,
+        "class_names": crop_class_names,
+        "disease_info": crop_disease_info
+    }
 
-def load_all_models():
-    """Load all available models"""
-    print("=" * 60)
-    print("🌾🍵 Loading All Crop Disease Models")
-    print("=" * 60)
+def load_keras_model(model_path: str):
+    """Load a .keras model (TensorFlow is imported on first use)"""
+    from tensorflow import keras
     
-    results = {}
-    for crop_type in MODELS_CONFIG.keys():
-        results[crop_type] = load_crop_model(crop_type)
+    return keras.models.load_model(model_path)
+
+def load_explainer(model_path: str):
+    """Keras model, its fused Grad-CAM function and estimated size (float32 weights)"""
+    model = load_keras_model(model_path)
+    return model, build_explain_fn(model), model.count_params() * 4
+
+def load_crop_model(crop_type: str):
+    """Load the disease model for a specific crop type (called lazily by the registry)"""
+    config = MODELS_CONFIG.get(crop_type)
+    if not config:
+        print(f"⚠️ Unknown crop type: {crop_type}")
+        return None
+    
+    if not os.path.exists(config["model_path"]):
+        print(f"⚠️ {crop_type.title()} model not found at {config['model_path']}")
+        return None
+    
+    print(f"\n🔄 Loading {crop_type} model...")
+    
+    batch_sizes = get_warmup_batch_sizes(BATCH_MAX_SIZE, (BATCH_PREDICT_CHUNK_SIZE,))
+    pool = None
+    if INFERENCE_BACKEND == "tflite":
+        # Allocated per warmed batch size, plus the largest batch the service builds
+        pool = load_tflite_pool(crop_type, [*batch_sizes, max(BATCH_MAX_SIZE, BATCH_PREDICT_CHUNK_SIZE)])
+    
+    if pool is not None:
+        from tflite_backend import TFLITE_PRECISION
+        # Classification never touches Keras; it is loaded by the first Grad-CAM request.
+        # Estimated resident size: every interpreter holds its own tensors and packed weights
+        entry = CropModel(crop_type, None, pool, f"tflite-{TFLITE_PRECISION}",
+                          os.path.getsize(pool.model_path) * pool.interpreter_count,
+                          load_explainer=lambda: load_explainer(config["model_path"]))
+        print(f"✅ {crop_type.title()} model loaded from {pool.model_path} ({entry.backend} backend)")
+    else:
+        model, explain, size_bytes = load_explainer(config["model_path"])
+        infer = compile_inference_fn(model)
+        entry = CropModel(crop_type, model, lambda batch: infer(batch).numpy(), "keras", size_bytes, explain=explain)
+        print(f"✅ {crop_type.title()} model loaded from {config['model_path']} (keras backend)")
+    
+    # Preloaded or lazily loaded (or reloaded after eviction), every model is traced at
+    # each warm-up batch size before the registry hands it to a request
+    warm_up_crop_model(crop_type, entry, batch_sizes)
+    if batch_sizes:
+        print(f"🔥 {crop_type.title()} model warmed up (batch sizes {batch_sizes})")
+    return entry
+
+def crop_model_available(crop_type: str) -> bool:
+    """Whether a crop can be served (model file and class indices present)"""
+    config = MODELS_CONFIG.get(crop_type)
+    return bool(config) and os.path.exists(config["model_path"]) and \
+        model_registry.metadata(crop_type) is not None
+
+def get_model_version(crop_type: str) -> str:
+    """Identify the model file and backend serving a crop (part of the prediction cache key)"""
+    model_path = MODELS_CONFIG[crop_type]["model_path"]
+    stat = os.stat(model_path)
+    backend = INFERENCE_BACKEND
+    if INFERENCE_BACKEND == "tflite":
+        from tflite_backend import TFLITE_PRECISION, get_tflite_path
+        tflite_path = get_tflite_path(model_path)
+        if os.path.exists(tflite_path):
+            tflite_stat = os.stat(tflite_path)
+            backend = f"tflite-{TFLITE_PRECISION}-{int(tflite_stat.st_mtime)}-{tflite_stat.st_size}"
+        else:
+            backend = "keras"
+    return f"{int(stat.st_mtime)}-{stat.st_size}-{backend}"
+
+def register_subsystems(crop_types=PRELOAD_CROPS):
+    """Subsystems that must be warm (or have failed) before /ready reports the process ready"""
+    for crop in crop_types:
+        if crop in MODELS_CONFIG:
+            startup_profile.register(f"{crop}_model")
+    startup_profile.register("crop_suitability")
+    startup_profile.register("yield_predictor")
+
+def warm_up_crop_model(crop_type: str, entry: CropModel, batch_sizes):
+    """
+    Run synthetic batches through a loaded crop model's classify and Grad-CAM paths
+    
+    Every new batch shape pays for kernel selection and allocator growth once,
+    so each batch size the micro-batcher and /predict/batch can produce is run
+    here instead of on the first real requests. The resulting heatmap then goes
+    through the colour LUT, overlay blending and each image encoder. A TFLite
+    entry whose Keras model is not loaded yet only warms classification.
+    """
+    if not batch_sizes:
+        return
+    batch, image = make_warmup_batch(max(batch_sizes))
     
-    return results
+    heatmap = None
+    for size in batch_sizes:
+        with startup_profile.timed("warmup", f"{crop_type}/infer@{size}"):
+            entry.infer(batch[:size])
+        if entry.explainer_loaded and entry.explain is not None:
+            with startup_profile.timed("warmup", f"{crop_type}/explain@{size}"):
+                _, heatmaps = entry.explain(batch[:size])
+                heatmap = heatmaps.numpy()[0]
+    
+    if heatmap is None and entry.model is not None:
+        with startup_profile.timed("warmup", f"{crop_type}/attention"):
+            heatmap = generate_simple_attention(entry.model, batch[:1], 0)
+    if heatmap is not None:
+        with startup_profile.timed("warmup", f"{crop_type}/gradcam_render"):
+            render_gradcam(image, heatmap)
+            for fmt in ("webp", "jpeg"):
+                render_explanation_image("overlay", image, heatmap, fmt)
+                render_explanation_image("heatmap", image, heatmap, fmt)
+            encode_heatmap_raw(heatmap)
 
-def preprocess_image(image_bytes):
-    """Preprocess image for model prediction"""
-    # Open image
-    image = Image.open(io.BytesIO(image_bytes))
+def warm_up_subsystems(crop_types=PRELOAD_CROPS):
+    """
+    Load and warm up the preloaded crop models, crop suitability and yield models (blocking - run on the executor)
     
-    # Convert to RGB if necessary
-    if image.mode != 'RGB':
-        image = image.convert('RGB')
+    Heavy libraries are imported here rather than when main is imported, so
+    /health answers as soon as the server starts while /ready waits for this.
+    A subsystem only turns ready after synthetic requests have gone through
+    it (every warm-up batch size for crop models, see model_warmup.py).
+    Each step is timed in the startup profile (/metrics/startup).
+    """
+    register_subsystems(crop_types)
+    crops = [c for c in crop_types if c in MODELS_CONFIG]
     
-    # Resize
-    image = image.resize(IMAGE_SIZE, Image.Resampling.LANCZOS)
+    if crops:
+        print("=" * 60)
+        print("🌾🍵 Preloading Crop Disease Models")
+        print("=" * 60)
+        startup_profile.import_module("tensorflow")
+    for crop in crops:
+        try:
+            # The registry's loader runs the batch-size warm-up (see load_crop_model)
+            with startup_profile.warming(f"{crop}_model"):
+                if model_registry.get(crop) is None:
+                    raise RuntimeError(f"{crop} model or class indices not found")
+        except Exception as e:
+            print(f"⚠️ {crop.title()} model loading failed ({e}). Please train the model first.")
     
-    # Convert to numpy array and normalize
-    img_array = np.array(image) / 255.0
+    try:
+        with startup_profile.warming("crop_suitability"):
+            suitability = startup_profile.import_module("crop_suitability_model")
+            suitability.get_model()
+            with startup_profile.timed("warmup", "crop_suitability/predict"):
+                suitability.predict_suitability(dict(SUITABILITY_WARMUP_PAYLOAD))
+    except Exception as e:
+        print(f"⚠️ Crop suitability model unavailable: {e}")
     
-    # Add batch dimension
-    img_array = np.expand_dims(img_array, axis=0)
+    try:
+        with startup_profile.warming("yield_predictor"):
+            startup_profile.import_module("yield_predictor")
+            predictor = get_yield_predictor()
+            if predictor is None:
+                raise RuntimeError("Could not initialize yield predictor")
+            district, season, year = yield_warmup_query()
+            with startup_profile.timed("warmup", "yield_predictor/predict"):
+                predictor.predict(district, season, year, YIELD_WARMUP_AREA_HA)
+                predictor.predict_profit(district, season, year, YIELD_WARMUP_AREA_HA)
+                predictor.generate_early_warning(district, season, year)
+    except Exception as e:
+        print(f"⚠️ {e}")
+
+# Model registry (multi-crop) and inference pipeline
+model_registry = ModelRegistry(load_crop_model, load_crop_metadata, MODELS_CONFIG.keys())
+batchers = {}
+inference_executor = InferenceExecutor()
+explanation_jobs = ExplanationJobs()
+prediction_cache = PredictionCache()
+near_duplicates = NearDuplicateIndex()
+warm_up_task = None
+
+def run_explain_batch(crop_type: str, batch):
+    """Fused forward/backward pass: [(probabilities, heatmap)] per image"""
+    _, explain = model_registry.get(crop_type).explainer()
+    predictions, heatmaps = explain(batch)
+    return list(zip(predictions.numpy(), heatmaps.numpy()))
+
+async def get_explainer(entry: CropModel):
+    """An entry's (Keras model, Grad-CAM function), loaded on the executor the first time"""
+    if entry.explainer_loaded:
+        return entry.model, entry.explain
+    return await inference_executor.run(entry.explainer)
+
+def get_batcher(crop_type: str, explain: bool = False) -> MicroBatcher:
+    """Get or create the micro-batching scheduler for a crop (classify-only or fused Grad-CAM)"""
+    name = f"{crop_type}/explain" if explain else crop_type
+    if name not in batchers:
+        if explain:
+            run_batch = lambda batch: run_explain_batch(crop_type, batch)
+        else:
+            run_batch = lambda batch: model_registry.get(crop_type).infer(batch)
+        batchers[name] = MicroBatcher(name, run_batch, executor=inference_executor.pool)
+    return batchers[name]
+
+def preprocess_and_fingerprint(source):
+    """Preprocess an upload and compute its perceptual hash (dHash of the resized image)"""
+    img_array, image = preprocess_image(source)
+    return img_array, image, dhash(image)
+
+def find_gradcam_layers(model):
+    """
+    Find the MobileNet/EfficientNet base model and its last conv layer
+    Returns (base_model, conv_layer) or (None, None)
+    """
+    for layer in model.layers:
+        if 'mobilenetv2' in layer.name.lower() or 'mobilenet' in layer.name.lower():
+            # It's the base model - get the last convolutional layer
+            for sub_layer in reversed(layer.layers):
+                if 'conv' in sub_layer.name.lower() and 'bn' not in sub_layer.name.lower():
+                    return layer, sub_layer
+            break
+        elif 'efficientnet' in layer.name.lower():
+            for sub_layer in reversed(layer.layers):
+                if 'conv' in sub_layer.name.lower():
+                    return layer, sub_layer
+            break
     
-    return img_array, image
+    return None, None
 
-def generate_gradcam(model, img_array, class_idx, layer_name=None):
+def build_explain_fn(model):
     """
-    Generate Grad-CAM heatmap for the predicted class
-    Works with MobileNetV2 architecture
+    Build the fused classification + Grad-CAM graph once per crop (at model load time)
+    
+    The returned tf.function takes a float32 batch and runs a single taped
+    forward pass that yields the class probabilities and the last conv
+    activations, then differentiates each image's argmax score with respect to
+    its feature map. Returns (predictions, heatmaps), one normalized heatmap
+    per image. Images are independent in inference mode, so the summed loss
+    gives per-image gradients and the whole batch shares one backward pass.
+    Returns None if the architecture has no recognizable conv base.
     """
+    import tensorflow as tf
+    from tensorflow import keras
+    
+    base_model, conv_layer = find_gradcam_layers(model)
+    if conv_layer is None:
+        print("⚠️ Could not find conv layer for Grad-CAM")
+        return None
+    
     try:
-        # For MobileNetV2, get the last conv layer from the base model
-        grad_model = None
-        conv_layer = None
-        
-        # Find the MobileNetV2 base model and its last conv layer
-        for layer in model.layers:
-            if 'mobilenetv2' in layer.name.lower() or 'mobilenet' in layer.name.lower():
-                # It's the base model
-                base_model = layer
-                # Get the last convolutional layer output
-                for sub_layer in reversed(base_model.layers):
-                    if 'conv' in sub_layer.name.lower() and 'bn' not in sub_layer.name.lower():
-                        conv_layer = sub_layer
-                        break
-                break
-            elif 'efficientnet' in layer.name.lower():
-                base_model = layer
-                for sub_layer in reversed(base_model.layers):
-                    if 'conv' in sub_layer.name.lower():
-                        conv_layer = sub_layer
-                        break
-                break
-        
-        if conv_layer is None:
-            print("⚠️ Could not find conv layer for Grad-CAM")
-            return None
-        
-        # Create grad model
-        # Get the output of the conv layer through the base model
-        base_model_output = base_model(model.input)
-        
-        # We need to rebuild to get intermediate outputs
-        # Create a new model that outputs both conv features and predictions
-        intermediate_model = keras.Model(
-            inputs=base_model.input,
-            outputs=base_model.get_layer(conv_layer.name).output
+        # Base model returning both conv activations and its normal output
+        base_outputs = keras.Model(
+            inputs=base_model.inputs,
+            outputs=[conv_layer.output, base_model.output]
         )
         
-        # Get conv outputs
+        # Replay the layers around the base so conv features and predictions
+        # come from the same forward pass (the classifiers are linear chains)
+        inputs = keras.Input(shape=model.input_shape[1:])
+        x = inputs
+        conv_outputs = None
+        for layer in model.layers:
+            if isinstance(layer, keras.layers.InputLayer):
+                continue
+            if layer is base_model:
+                conv_outputs, x = base_outputs(x)
+            else:
+                x = layer(x)
+        grad_model = keras.Model(inputs=inputs, outputs=[conv_outputs, x])
+    except Exception as e:
+        print(f"⚠️ Could not build Grad-CAM model: {str(e)}")
+        return None
+    
+    @tf.function(input_signature=[tf.TensorSpec(shape=(None, *IMAGE_SIZE, 3), dtype=tf.float32)])
+    def explain(images):
         with tf.GradientTape() as tape:
-            # Forward pass through base model to get conv outputs
-            conv_outputs = intermediate_model(img_array)
-            tape.watch(conv_outputs)
-            
-            # Continue forward pass to get predictions
-            x = layers.GlobalAveragePooling2D()(conv_outputs)
-            
-            # We need predictions, so use the full model
-            predictions = model(img_array)
-            loss = predictions[:, class_idx]
+            conv_outputs, predictions = grad_model(images, training=False)
+            top_classes = tf.argmax(predictions, axis=-1)
+            top_scores = tf.gather(predictions, top_classes, axis=1, batch_dims=1)
+            loss = tf.reduce_sum(top_scores)
         
-        # Get gradients
         grads = tape.gradient(loss, conv_outputs)
         
-        if grads is None:
-            # Fallback: simple attention-based visualization
-            return generate_simple_attention(model, img_array, class_idx)
-        
-        # Global average pooling of gradients
-        pooled_grads = tf.reduce_mean(grads, axis=(0, 1, 2))
-        
-        # Weight conv outputs by gradients
-        conv_outputs = conv_outputs[0]
-        heatmap = tf.reduce_sum(tf.multiply(pooled_grads, conv_outputs), axis=-1)
+        # Per-image global average pooling of gradients, weight conv outputs by them
+        pooled_grads = tf.reduce_mean(grads, axis=(1, 2), keepdims=True)
+        heatmaps = tf.reduce_sum(conv_outputs * pooled_grads, axis=-1)
         
-        # ReLU and normalize
-        heatmap = np.maximum(heatmap.numpy(), 0)
-        if np.max(heatmap) > 0:
-            heatmap /= np.max(heatmap)
-        
-        return heatmap
-        
-    except Exception as e:
-        print(f"⚠️ Grad-CAM error: {str(e)}")
-        # Fallback to simple attention
-        return generate_simple_attention(model, img_array, class_idx)
+        # ReLU and normalize each heatmap
+        heatmaps = tf.nn.relu(heatmaps)
+        max_values = tf.reduce_max(heatmaps, axis=(1, 2), keepdims=True)
+        return predictions, tf.math.divide_no_nan(heatmaps, max_values)
+    
+    # Warm up: trace the gradient graph before serving traffic
+    explain(tf.zeros((1, *IMAGE_SIZE, 3), dtype=tf.float32))
+    return explain
 
 def generate_simple_attention(model, img_array, class_idx):
     """
     Generate a simple attention map based on gradient of output w.r.t. input
     Fallback when Grad-CAM fails
     """
+    import tensorflow as tf
+    
     try:
         img_tensor = tf.convert_to_tensor(img_array)
         
@@ -276,57 +498,74 @@ def generate_simple_attention(model, img_array, class_idx):
         print(f"⚠️ Attention map error: {str(e)}")
         return None
 
-def create_gradcam_overlay(original_image, heatmap, alpha=0.4):
-    """
-    Overlay Grad-CAM heatmap on original image
-    
-    Returns base64 encoded image
-    """
-    # Convert PIL image to numpy array
-    img_array = np.array(original_image)
-    
-    # Resize heatmap to match image size
-    heatmap_resized = cv2.resize(heatmap, (img_array.shape[1], img_array.shape[0]))
-    
-    # Convert heatmap to RGB colormap
-    heatmap_colored = cv2.applyColorMap(np.uint8(255 * heatmap_resized), cv2.COLORMAP_JET)
-    heatmap_colored = cv2.cvtColor(heatmap_colored, cv2.COLOR_BGR2RGB)
-    
-    # Overlay heatmap on original image
-    overlay = np.uint8(img_array * (1 - alpha) + heatmap_colored * alpha)
+def describe_prediction(predictions, metadata):
+    """Top class, disease info and sorted class probabilities for one image's predictions"""
+    predicted_idx = int(np.argmax(predictions))
+    predicted_class = metadata["class_names"][predicted_idx]
+    info = metadata["disease_info"].get(predicted_class, {})
     
-    # Convert to base64
-    overlay_image = Image.fromarray(overlay)
-    buffer = io.BytesIO()
-    overlay_image.save(buffer, format='PNG')
-    buffer.seek(0)
+    all_preds = [
+        {"class": metadata["class_names"][idx], "probability": float(prob)}
+        for idx, prob in enumerate(predictions)
+    ]
+    all_preds.sort(key=lambda x: x['probability'], reverse=True)
     
-    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+    return {
+        "prediction": predicted_class,
+        "confidence": float(predictions[predicted_idx]),
+        "si_name": info.get("si_name", predicted_class),
+        "description": info.get("description", ""),
+        "treatment": info.get("treatment", []),
+        "severity": info.get("severity", "unknown"),
+        "all_predictions": all_preds
+    }
 
-def create_heatmap_only(heatmap):
-    """Create standalone heatmap image as base64"""
-    # Resize to standard size
-    heatmap_resized = cv2.resize(heatmap, IMAGE_SIZE)
-    
-    # Apply colormap
-    heatmap_colored = cv2.applyColorMap(np.uint8(255 * heatmap_resized), cv2.COLORMAP_JET)
-    heatmap_colored = cv2.cvtColor(heatmap_colored, cv2.COLOR_BGR2RGB)
+async def explain_prediction(crop_type: str, img_array, original_image, predicted_idx: int):
+    """Background job for explain=async: compute Grad-CAM for a classified image (rendered on fetch)"""
+    entry = await inference_executor.run(model_registry.get, crop_type)
+    if entry is None:
+        raise RuntimeError(f"{crop_type.title()} model could not be loaded")
     
-    # Convert to base64
-    heatmap_image = Image.fromarray(heatmap_colored)
-    buffer = io.BytesIO()
-    heatmap_image.save(buffer, format='PNG')
-    buffer.seek(0)
-    
-    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+    heatmap = None
+    model, explain = await get_explainer(entry)
+    if explain is not None:
+        try:
+            _, heatmap = await get_batcher(crop_type, explain=True).submit(img_array[0])
+        except Exception as e:
+            print(f"⚠️ Grad-CAM error: {str(e)}")
+    if heatmap is None:
+        heatmap = await inference_executor.run(
+            generate_simple_attention, model, img_array, predicted_idx
+        )
+    return {"image": original_image, "heatmap": heatmap}
+
+def explanation_links(explanation_id: str, status: str, gradcam_format: GradcamFormat):
+    """Where to fetch a stored explanation and its binary renderings"""
+    ext = gradcam_format.value if gradcam_format in (GradcamFormat.webp, GradcamFormat.jpeg) else "png"
+    base = f"/explain/{explanation_id}"
+    return {
+        "id": explanation_id,
+        "status": status,
+        "url": base,
+        "overlay_url": f"{base}/overlay.{ext}",
+        "heatmap_url": f"{base}/heatmap.{ext}",
+        "raw_url": f"{base}/heatmap.f16"
+    }
 
 @app.on_event("startup")
 async def startup_event():
-    """Load all models on startup"""
-    results = load_all_models()
-    for crop, success in results.items():
-        if not success:
-            print(f"⚠️ {crop.title()} model loading failed. Please train the model first.")
+    """Warm up models in the background: /health answers immediately, /ready once warm"""
+    global warm_up_task
+    register_subsystems()
+    warm_up_task = asyncio.ensure_future(inference_executor.run(warm_up_subsystems))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background explanation/batching workers and the inference pool"""
+    await explanation_jobs.close()
+    for batcher in batchers.values():
+        await batcher.close()
+    inference_executor.shutdown()
 
 @app.get("/")
 async def root():
@@ -336,21 +575,29 @@ async def root():
         "service": "Govi Isuru Multi-Crop Disease Predictor",
         "version": "3.0.0",
         "supported_crops": list(MODELS_CONFIG.keys()),
-        "models_loaded": {crop: (crop in models) for crop in MODELS_CONFIG.keys()},
+        "models_loaded": {crop: model_registry.is_loaded(crop) for crop in MODELS_CONFIG.keys()},
         "classes": {
-            crop: list(class_indices.get(crop, {}).values()) 
+            crop: list((model_registry.metadata(crop) or {}).get("class_indices", {}).values()) 
             for crop in MODELS_CONFIG.keys()
         }
     }
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Liveness check: answers as soon as the server is up, whether or not models are warm"""
     return {
         "status": "healthy",
-        "models_loaded": {crop: (crop in models) for crop in MODELS_CONFIG.keys()}
+        "ready": startup_profile.ready,
+        "models_loaded": {crop: model_registry.is_loaded(crop) for crop in MODELS_CONFIG.keys()},
+        "models_available": {crop: crop_model_available(crop) for crop in MODELS_CONFIG.keys()}
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check: 200 once every subsystem is warm or failed (listed in "degraded"), otherwise 503"""
+    body = startup_profile.readiness()
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
 @app.get("/crops")
 async def get_supported_crops():
     """Get list of supported crop types"""
@@ -359,17 +606,121 @@ async def get_supported_crops():
             {
                 "type": crop,
                 "name": crop.title(),
-                "model_loaded": crop in models,
-                "classes_count": len(class_names.get(crop, {}))
+                "model_loaded": model_registry.is_loaded(crop),
+                "model_available": crop_model_available(crop),
+                "backend": getattr(model_registry.peek(crop), "backend", None),
+                "classes_count": len((model_registry.metadata(crop) or {}).get("class_names", {}))
             }
             for crop in MODELS_CONFIG.keys()
         ]
     }
 
+@app.get("/metrics/batching")
+async def get_batching_metrics():
+    """Queue depth and batch-size histograms for each crop's batching scheduler"""
+    return {
+        "batchers": {crop: batcher.stats() for crop, batcher in batchers.items()}
+    }
+
+@app.get("/metrics/startup")
+async def get_startup_metrics():
+    """Per-import and per-loader startup timings and subsystem warm-up states"""
+    return startup_profile.report()
+
+@app.get("/metrics/models")
+async def get_model_metrics():
+    """Loaded crop models, estimated memory and LRU eviction counts"""
+    return model_registry.stats()
+
+@app.get("/metrics/inference")
+async def get_inference_metrics():
+    """Admission and concurrency statistics for the inference executor and upload budget"""
+    return {
+        **inference_executor.stats(),
+        "uploads": upload_budget.stats()
+    }
+
+@app.get("/metrics/explanations")
+async def get_explanation_metrics():
+    """Background Grad-CAM job queue and result cache statistics"""
+    return explanation_jobs.stats()
+
+@app.get("/metrics/cache")
+async def get_cache_metrics():
+    """Prediction cache and near-duplicate index sizes and hit/miss counts"""
+    return {
+        **prediction_cache.stats(),
+        "near_duplicates": near_duplicates.stats()
+    }
+
+def get_explanation_job(explanation_id: str):
+    job = explanation_jobs.get(explanation_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Explanation not found or expired")
+    return job
+
+@app.get("/explain/{explanation_id}")
+async def get_explanation(
+    explanation_id: str,
+    gradcam_format: GradcamFormat = Query(default=GradcamFormat.png, description="png: inline base64, raw: float16 heatmap, webp/jpeg: links only")
+):
+    """
+    Fetch a Grad-CAM explanation queued by /predict?explain=async
+    
+    Returns 202 while the job is pending or running, 404 once it has expired.
+    """
+    job = get_explanation_job(explanation_id)
+    body = explanation_links(explanation_id, job["status"], gradcam_format)
+    body["gradcam"] = None
+    
+    result = job.get("result")
+    if result is not None and result["heatmap"] is not None:
+        if gradcam_format == GradcamFormat.png:
+            body["gradcam"] = await inference_executor.run(render_gradcam, result["image"], result["heatmap"])
+        elif gradcam_format == GradcamFormat.raw:
+            body["heatmap_raw"] = encode_heatmap_raw(result["heatmap"])
+    if job["status"] == "failed":
+        body["error"] = job.get("error")
+    return JSONResponse(body, status_code=202 if job["status"] in ("pending", "running") else 200)
+
+@app.get("/explain/{explanation_id}/{resource}")
+async def get_explanation_resource(
+    explanation_id: str,
+    resource: str,
+    quality: int = Query(default=EXPLAIN_IMAGE_QUALITY, ge=1, le=100, description="WebP/JPEG quality")
+):
+    """
+    Binary Grad-CAM renderings: overlay.webp|jpg|png, heatmap.webp|jpg|png,
+    or heatmap.f16 (raw little-endian float16, shape in X-Heatmap-Shape)
+    """
+    kind, _, ext = resource.partition(".")
+    if kind not in ("overlay", "heatmap") or (ext not in IMAGE_FORMATS and not (kind == "heatmap" and ext == "f16")):
+        raise HTTPException(status_code=404, detail=f"Unknown explanation resource '{resource}'")
+    
+    job = get_explanation_job(explanation_id)
+    if job["status"] in ("pending", "running"):
+        return JSONResponse({"id": explanation_id, "status": job["status"]}, status_code=202)
+    result = job.get("result")
+    if result is None or result["heatmap"] is None:
+        raise HTTPException(status_code=404, detail="Explanation has no heatmap")
+    
+    headers = {"Cache-Control": "private, max-age=300"}
+    if ext == "f16":
+        heatmap = np.asarray(result["heatmap"], dtype='<f2')
+        headers["X-Heatmap-Shape"] = ",".join(str(d) for d in heatmap.shape)
+        return Response(heatmap.tobytes(), media_type="application/octet-stream", headers=headers)
+    
+    content = await inference_executor.run(
+        render_explanation_image, kind, result["image"], result["heatmap"], ext, quality
+    )
+    return Response(content, media_type=IMAGE_FORMATS[ext][1], headers=headers)
+
 @app.post("/predict")
 async def predict_disease(
     file: UploadFile = File(...),
-    crop_type: CropType = Query(default=CropType.rice, description="Type of crop (rice,tea or chili)")
+    crop_type: CropType = Query(default=CropType.rice, description="Type of crop (rice,tea or chili)"),
+    explain: ExplainMode = Query(default=ExplainMode.sync, description="Grad-CAM: none, sync (inline) or async (fetch from /explain/{id})"),
+    gradcam_format: GradcamFormat = Query(default=GradcamFormat.png, description="png: inline base64, webp/jpeg: binary URLs, raw: float16 heatmap")
 ):
     """
     Predict crop disease from uploaded image
@@ -377,17 +728,23 @@ async def predict_disease(
     Parameters:
     - file: Image file
     - crop_type: Type of crop (rice or tea)
+    - explain: none (label only), sync (Grad-CAM inline) or async (explanation ID)
+    - gradcam_format: png (base64 in the JSON), webp/jpeg (URLs under /explain/{id}),
+      raw (7x7 float16 heatmap for client-side colourising)
     
     Returns:
     - prediction: Disease name
     - confidence: Prediction confidence (0-1)
     - all_predictions: All class probabilities
     - disease_info: Treatment and information
-    - gradcam: Grad-CAM visualization (base64)
+    - gradcam: Grad-CAM visualization (base64), sync mode with png format only
+    - heatmap_raw: {shape, dtype, data} float16 heatmap, sync mode with raw format only
+    - explanation: {id, status, url, overlay_url, heatmap_url, raw_url} for async mode,
+      or sync mode with webp/jpeg format
     """
     crop = crop_type.value
     
-    if crop not in models:
+    if not crop_model_available(crop):
         raise HTTPException(
             status_code=503,
             detail=f"{crop.title()} model not loaded. Please ensure the model is trained and available."
@@ -401,80 +758,257 @@ async def predict_disease(
         )
     
     try:
-        # Read image
-        image_bytes = await file.read()
+        # The upload is already spooled (memory up to 1 MB, then a temp file);
+        # hash and decode it in place instead of reading it into a bytes copy
+        upload = file.file
         
-        print("🔄 Prediction in process...")
-        # Preprocess
-        img_array, original_image = preprocess_image(image_bytes)
-        
-        # Predict using the correct model
-        model = models[crop]
-        predictions = model.predict(img_array, verbose=0)[0]
-        
-        # Get top prediction
-        predicted_idx = int(np.argmax(predictions))
-        confidence = float(predictions[predicted_idx])
-        predicted_class = class_names[crop][predicted_idx]
-        
-        # Generate Grad-CAM
-        gradcam_data = None
-        heatmap = generate_gradcam(model, img_array, predicted_idx)
-        
-        if heatmap is not None:
-            overlay_base64 = create_gradcam_overlay(original_image, heatmap)
-            heatmap_base64 = create_heatmap_only(heatmap)
-            gradcam_data = {
-                "overlay": overlay_base64,
-                "heatmap": heatmap_base64
-            }
-        
-        # Get disease information for this crop
-        info = disease_info.get(crop, {}).get(predicted_class, {})
+        # Re-submitted photos are answered from the cache without running the model
+        # Responses that point at expiring /explain/{id} resources are not cached
+        binary_gradcam = gradcam_format in (GradcamFormat.webp, GradcamFormat.jpeg)
+        cacheable = explain == ExplainMode.none or (explain == ExplainMode.sync and not binary_gradcam)
+        cache_mode = f"{explain.value}:{gradcam_format.value}" if explain == ExplainMode.sync else explain.value
+        # A near-duplicate is a different photo: its label carries over, a Grad-CAM overlay
+        # rendered onto that other photo does not (raw heatmaps are image-free)
+        reuse_near_duplicates = explain == ExplainMode.none or (
+            explain == ExplainMode.sync and gradcam_format == GradcamFormat.raw
+        )
+        model_version = get_model_version(crop) if cacheable else None
+        cache_key = None
+        if cacheable and prediction_cache.enabled:
+            upload_hash = await inference_executor.run(hash_upload, upload)
+            cache_key = make_cache_key(upload_hash, crop, model_version, cache_mode)
+            cached = prediction_cache.get(cache_key)
+            if cached is not None:
+                return JSONResponse({**cached, "cached": True})
         
-        # Build all predictions
-        all_preds = []
-        for idx, prob in enumerate(predictions):
-            all_preds.append({
-                "class": class_names[crop][idx],
-                "probability": float(prob)
-            })
-        all_preds.sort(key=lambda x: x['probability'], reverse=True)
+        with inference_executor.admit():
+            print("🔄 Prediction in process...")
+            # Preprocess (off the event loop)
+            img_array, original_image, image_hash = await inference_executor.run(
+                preprocess_and_fingerprint, upload
+            )
+            
+            # Recompressed/resized copy of a recently classified photo: reuse its result
+            namespace = (crop, model_version, cache_mode)
+            if reuse_near_duplicates and near_duplicates.enabled:
+                match = near_duplicates.lookup(namespace, image_hash)
+                if match is not None:
+                    cached, distance = match
+                    return JSONResponse({**cached, "cached": True, "near_duplicate_distance": distance})
+            
+            # Load the crop's model on first use (evicting idle crops if over budget)
+            entry = await inference_executor.run(model_registry.get, crop)
+            if entry is None:
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"{crop.title()} model could not be loaded."
+                )
+            metadata = model_registry.metadata(crop)
+            
+            # Classify and compute Grad-CAM in one forward/backward pass
+            # (batched with concurrent requests)
+            heatmap = None
+            predictions = None
+            keras_model = None
+            if explain == ExplainMode.sync:
+                keras_model, explain_fn = await get_explainer(entry)
+                if explain_fn is not None:
+                    try:
+                        predictions, heatmap = await get_batcher(crop, explain=True).submit(img_array[0])
+                    except Exception as e:
+                        print(f"⚠️ Grad-CAM error: {str(e)}")
+            if predictions is None:
+                predictions = await get_batcher(crop).submit(img_array[0])
+            
+            # Get top prediction
+            predicted_idx = int(np.argmax(predictions))
+            
+            gradcam_data = None
+            heatmap_raw = None
+            explanation = None
+            if explain == ExplainMode.sync:
+                # Fallback: simple attention when Grad-CAM is unavailable
+                if heatmap is None:
+                    heatmap = await inference_executor.run(
+                        generate_simple_attention, keras_model, img_array, predicted_idx
+                    )
+                if gradcam_format == GradcamFormat.png:
+                    gradcam_data = await inference_executor.run(render_gradcam, original_image, heatmap)
+                elif gradcam_format == GradcamFormat.raw:
+                    heatmap_raw = encode_heatmap_raw(heatmap) if heatmap is not None else None
+                else:
+                    # Binary images are encoded when the client fetches them
+                    explanation_id = explanation_jobs.put({"image": original_image, "heatmap": heatmap})
+                    explanation = explanation_links(explanation_id, "done", gradcam_format)
+            elif explain == ExplainMode.async_:
+                # Classification returns now; Grad-CAM is computed by a background worker
+                try:
+                    explanation_id = explanation_jobs.submit(
+                        lambda: explain_prediction(crop, img_array, original_image, predicted_idx)
+                    )
+                    explanation = explanation_links(explanation_id, "pending", gradcam_format)
+                except ExplanationQueueFull:
+                    explanation = {"id": None, "status": "rejected", "url": None}
         
-        return JSONResponse({
+        response = {
             "success": True,
             "crop_type": crop,
-            "prediction": predicted_class,
-            "confidence": confidence,
-            "si_name": info.get("si_name", predicted_class),
-            "description": info.get("description", ""),
-            "treatment": info.get("treatment", []),
-            "severity": info.get("severity", "unknown"),
-            "all_predictions": all_preds,
-            "gradcam": gradcam_data
-        })
+            **describe_prediction(predictions, metadata),
+            "gradcam": gradcam_data,
+            "heatmap_raw": heatmap_raw,
+            "explain": explain.value,
+            "explanation": explanation
+        }
+        if cache_key is not None:
+            # Off the event loop: the on-disk tier writes a file
+            await inference_executor.run(prediction_cache.set, cache_key, response)
+        if reuse_near_duplicates:
+            near_duplicates.add(namespace, image_hash, response)
+        
+        return JSONResponse({**response, "cached": False})
         
+    except HTTPException:
+        raise
+    except (ImageTooLarge, Image.DecompressionBombError) as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ExecutorSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Prediction service is busy. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Prediction failed: {str(e)}"
         )
 
+def read_batch_chunk(chunk_items):
+    """Read a chunk's images sequentially (tar members share one file position)"""
+    sources = []
+    for _, reader in chunk_items:
+        try:
+            sources.append(reader())
+        except Exception as e:
+            sources.append(e)
+    return sources
+
+def preprocess_into(source, out):
+    """Preprocess one image into a row of a batch buffer (blocking)"""
+    if isinstance(source, Exception):
+        raise source
+    preprocess_image(source, out=out)
+
+@app.post("/predict/batch")
+async def predict_disease_batch(
+    files: List[UploadFile] = File(..., description="Leaf images, or ZIP/tar archives of images"),
+    crop_type: CropType = Query(default=CropType.rice, description="Type of crop (rice,tea or chili)")
+):
+    """
+    Predict diseases for many images in one request (e.g. one farm visit)
+    
+    Images are decoded in parallel and classified in chunks of up to
+    BATCH_PREDICT_CHUNK_SIZE per forward pass. Streams NDJSON: one
+    {"type": "result"} line per image as each chunk finishes, then a
+    {"type": "summary"} line with the field-level diagnosis.
+    """
+    crop = crop_type.value
+    
+    if not crop_model_available(crop):
+        raise HTTPException(
+            status_code=503,
+            detail=f"{crop.title()} model not loaded. Please ensure the model is trained and available."
+        )
+    
+    try:
+        items = await inference_executor.run(open_batch_items, files)
+    except (BatchInputError, zipfile.BadZipFile, tarfile.TarError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Hold one admission slot for the whole stream
+    admission = ExitStack()
+    try:
+        admission.enter_context(inference_executor.admit())
+    except ExecutorSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Prediction service is busy. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    entry = await inference_executor.run(model_registry.get, crop)
+    if entry is None:
+        admission.close()
+        raise HTTPException(status_code=503, detail=f"{crop.title()} model could not be loaded.")
+    metadata = model_registry.metadata(crop)
+    
+    async def stream_results():
+        try:
+            results = []
+            buffer = np.empty((BATCH_PREDICT_CHUNK_SIZE, *IMAGE_SIZE, 3), dtype=np.float32)
+            
+            for start in range(0, len(items), BATCH_PREDICT_CHUNK_SIZE):
+                chunk_items = items[start:start + BATCH_PREDICT_CHUNK_SIZE]
+                sources = await inference_executor.run(read_batch_chunk, chunk_items)
+                
+                # Decode the chunk in parallel, each image into its own buffer row
+                outcomes = await asyncio.gather(*[
+                    inference_executor.run(preprocess_into, source, row)
+                    for source, row in zip(sources, buffer)
+                ], return_exceptions=True)
+                decoded = [i for i, outcome in enumerate(outcomes) if not isinstance(outcome, Exception)]
+                
+                # One forward pass for every image that decoded
+                predictions = iter([])
+                if decoded:
+                    batch = buffer[:len(decoded)] if len(decoded) == len(chunk_items) else buffer[decoded]
+                    predictions = iter(await inference_executor.run(entry.infer, batch))
+                
+                lines = []
+                for i, ((name, _), outcome) in enumerate(zip(chunk_items, outcomes)):
+                    record = {"type": "result", "index": start + i, "filename": name}
+                    if isinstance(outcome, Exception):
+                        record["error"] = str(outcome)
+                    else:
+                        record.update(describe_prediction(next(predictions), metadata))
+                    results.append(record)
+                    lines.append(json.dumps(record) + "\n")
+                yield "".join(lines)
+            
+            summary = summarize_field(results, metadata["class_names"], metadata["disease_info"])
+            yield json.dumps({"type": "summary", "crop_type": crop, **summary}) + "\n"
+        finally:
+            admission.close()
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
 # Legacy endpoint for backward compatibility with rice predictions
 @app.post("/predict/rice")
-async def predict_rice_disease(file: UploadFile = File(...)):
+async def predict_rice_disease(
+    file: UploadFile = File(...),
+    explain: ExplainMode = Query(default=ExplainMode.sync),
+    gradcam_format: GradcamFormat = Query(default=GradcamFormat.png)
+):
     """Legacy endpoint for rice disease prediction"""
-    return await predict_disease(file=file, crop_type=CropType.rice)
+    return await predict_disease(file=file, crop_type=CropType.rice, explain=explain, gradcam_format=gradcam_format)
 
 @app.post("/predict/tea")
-async def predict_tea_disease(file: UploadFile = File(...)):
+async def predict_tea_disease(
+    file: UploadFile = File(...),
+    explain: ExplainMode = Query(default=ExplainMode.sync),
+    gradcam_format: GradcamFormat = Query(default=GradcamFormat.png)
+):
     """Endpoint for tea disease prediction"""
-    return await predict_disease(file=file, crop_type=CropType.tea)
+    return await predict_disease(file=file, crop_type=CropType.tea, explain=explain, gradcam_format=gradcam_format)
 
 @app.post("/predict/chili")
-async def predict_chili_disease(file: UploadFile = File(...)):
+async def predict_chili_disease(
+    file: UploadFile = File(...),
+    explain: ExplainMode = Query(default=ExplainMode.sync),
+    gradcam_format: GradcamFormat = Query(default=GradcamFormat.png)
+):
     """Endpoint for chili disease prediction"""
-    return await predict_disease(file=file, crop_type=CropType.chili)
+    return await predict_disease(file=file, crop_type=CropType.chili, explain=explain, gradcam_format=gradcam_format)
 
 @app.get("/classes")
 async def get_all_classes():
@@ -482,10 +1016,11 @@ async def get_all_classes():
     result = {}
     
     for crop in MODELS_CONFIG.keys():
-        if crop in class_indices:
+        metadata = model_registry.metadata(crop)
+        if metadata is not None:
             classes_with_info = []
-            for class_name in class_indices[crop].values():
-                info = disease_info.get(crop, {}).get(class_name, {})
+            for class_name in metadata["class_indices"].values():
+                info = metadata["disease_info"].get(class_name, {})
                 classes_with_info.append({
                     "name": class_name,
                     "si_name": info.get("si_name", class_name),
@@ -499,13 +1034,14 @@ async def get_all_classes():
 async def get_crop_classes(crop_type: CropType):
     """Get list of disease classes for a specific crop"""
     crop = crop_type.value
+    metadata = model_registry.metadata(crop)
     
-    if crop not in class_indices:
+    if metadata is None:
         return {"classes": []}
     
     classes_with_info = []
-    for class_name in class_indices[crop].values():
-        info = disease_info.get(crop, {}).get(class_name, {})
+    for class_name in metadata["class_indices"].values():
+        info = metadata["disease_info"].get(class_name, {})
         classes_with_info.append({
             "name": class_name,
             "si_name": info.get("si_name", class_name),
@@ -518,12 +1054,13 @@ async def get_crop_classes(crop_type: CropType):
 async def get_disease_info_by_crop(crop_type: CropType, disease_name: str):
     """Get detailed information about a specific disease for a crop"""
     crop = crop_type.value
+    metadata = model_registry.metadata(crop)
     
-    if crop not in disease_info:
+    if metadata is None:
         raise HTTPException(status_code=503, detail=f"Disease info for {crop} not loaded")
     
     # Find disease (case-insensitive)
-    for name, info in disease_info[crop].items():
+    for name, info in metadata["disease_info"].items():
         if name.lower() == disease_name.lower() or name.lower().replace('_', ' ') == disease_name.lower():
             return {
                 "crop": crop,
@@ -539,30 +1076,61 @@ async def get_disease_info_by_crop(crop_type: CropType, disease_name: str):
 # Initialize yield predictor
 yield_predictor = None
 
+# Largest scenario list accepted by POST /yield/batch
+YIELD_BATCH_MAX_SCENARIOS = int(os.getenv("YIELD_BATCH_MAX_SCENARIOS", "1000"))
+
+class YieldScenario(BaseModel):
+    district: str
+    season: str
+    year: int
+    area_ha: float = 1.0
+    cost_per_ha: Optional[float] = None
+    price_per_kg: Optional[float] = None
+
+class YieldBatchRequest(BaseModel):
+    scenarios: List[YieldScenario]
+
+def load_yield_predictor(model_path=None, data_path=None, use_pack=True):
+    """
+    Build a serving yield predictor: mapped pack (or pickle), historical data, forecast table
+    
+    Raises on failure; export_mapped_models.py checks exported packs through this same path.
+    """
+    from yield_predictor import YieldPredictor
+    from pathlib import Path
+    
+    data_path = Path(data_path or Path(__file__).parent / "paddy_data" / "paddy_statistics.json")
+    model_path = Path(model_path or Path(__file__).parent / "models" / "yield_predictor.pkl")
+    
+    predictor = YieldPredictor()
+    
+    # Try to load existing model (memory-mapped export first)
+    pack_path = get_pack_path(model_path)
+    if use_pack and pack_is_current(pack_path, model_path):
+        predictor.load_mapped_model(pack_path)
+        print("✅ Yield predictor model mapped")
+    elif model_path.exists():
+        predictor.load_model(model_path)
+        print("✅ Yield predictor model loaded")
+    
+    # Always load data for historical trends (even if model exists)
+    if data_path.exists():
+        predictor.load_data(data_path)
+        print("✅ Yield predictor historical data loaded")
+    else:
+        print("⚠️ Yield predictor data not found. Run extract_paddy_data.py first.")
+    
+    # Every district x season x year forecast in one batch; requests become lookups
+    table = predictor.build_forecast_table()
+    print(f"✅ Yield forecast table built ({len(table.districts)} districts, {table.first_year}-{table.last_year})")
+    return predictor
+
 def get_yield_predictor():
     """Get or initialize the yield predictor"""
     global yield_predictor
     if yield_predictor is None:
         try:
-            from yield_predictor import YieldPredictor
-            from pathlib import Path
-            
-            data_path = Path(__file__).parent / "paddy_data" / "paddy_statistics.json"
-            model_path = Path(__file__).parent / "models" / "yield_predictor.pkl"
-            
-            yield_predictor = YieldPredictor()
-            
-            # Try to load existing model
-            if model_path.exists():
-                yield_predictor.load_model(model_path)
-                print("✅ Yield predictor model loaded")
-            
-            # Always load data for historical trends (even if model exists)
-            if data_path.exists():
-                yield_predictor.load_data(data_path)
-                print("✅ Yield predictor historical data loaded")
-            else:
-                print("⚠️ Yield predictor data not found. Run extract_paddy_data.py first.")
+            yield_predictor = load_yield_predictor()
         except Exception as e:
             print(f"⚠️ Could not initialize yield predictor: {e}")
             yield_predictor = None
@@ -652,6 +1220,49 @@ async def predict_profit(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/yield/batch")
+async def predict_yield_batch(request: YieldBatchRequest):
+    """
+    Predict yield and profit for many (district, season, year, area) scenarios in one call
+    
+    All scenarios go through one vectorised forecast lookup and one pass of
+    profit arithmetic; results are returned in input order.
+    """
+    predictor = get_yield_predictor()
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Yield predictor not available")
+    
+    scenarios = request.scenarios
+    if len(scenarios) > YIELD_BATCH_MAX_SCENARIOS:
+        raise HTTPException(status_code=400, detail=f"At most {YIELD_BATCH_MAX_SCENARIOS} scenarios per request")
+    if not scenarios:
+        return {"success": True, "count": 0, "results": []}
+    
+    try:
+        columns = predictor.predict_profit_many(
+            [s.district for s in scenarios],
+            [s.season for s in scenarios],
+            [s.year for s in scenarios],
+            [s.area_ha for s in scenarios],
+            [s.cost_per_ha for s in scenarios],
+            [s.price_per_kg for s in scenarios]
+        )
+        columns = {name: values.tolist() for name, values in columns.items()}
+        results = [
+            {
+                "district": s.district,
+                "season": s.season,
+                "year": s.year,
+                **{name: values[i] for name, values in columns.items()}
+            }
+            for i, s in enumerate(scenarios)
+        ]
+        # Plain lists of JSON types: skip FastAPI's per-field response encoding
+        return JSONResponse({"success": True, "count": len(results), "results": results})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/yield/warning")
 async def get_early_warning(
     district: str = Query(..., description="District name"),
@@ -832,6 +1443,7 @@ if __name__ == "__main__":
     print("=" * 60)
     
     # Check for GPU
+    import tensorflow as tf
     gpus = tf.config.experimental.list_physical_devices('GPU')
     if gpus:
         print(f"🎮 GPU available: {len(gpus)} device(s)")
@@ -0,0 +1,279 @@
+"""
+Memory-mapped Model Weights
+Page-aligned weight packs that load with np.memmap instead of deserialising, plus flat tree-ensemble evaluators
+"""
+
+import os
+import json
+import mmap
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+PACK_FORMAT_VERSION = 1
+PAGE_SIZE = mmap.PAGESIZE
+
+
+def get_pack_path(model_path: str) -> str:
+    """models/crop_suitability.joblib -> models/crop_suitability.mmap.json (weights in .mmap.bin)"""
+    return f"{os.path.splitext(str(model_path))[0]}.mmap.json"
+
+
+def _bin_path(pack_path: str) -> str:
+    return f"{os.path.splitext(pack_path)[0]}.bin"
+
+
+def _source_info(source_path: str) -> Dict[str, Any]:
+    stat = os.stat(source_path)
+    return {"path": os.path.basename(source_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def write_pack(pack_path: str, kind: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any],
+               source_path: Optional[str] = None) -> int:
+    """
+    Write arrays to `<name>.mmap.bin` and their layout to `<name>.mmap.json`
+
+    Each array is stored uncompressed, little-endian and C-contiguous at a
+    page-aligned offset, so a reader can map the file and view every array in
+    place. Returns the size of the binary file.
+    """
+    layout = {}
+    offset = 0
+    bin_path = _bin_path(pack_path)
+    with open(bin_path, "wb") as f:
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            array = array.astype(array.dtype.newbyteorder("<"), copy=False)
+            offset = -(-offset // PAGE_SIZE) * PAGE_SIZE
+            f.seek(offset)
+            f.write(array.tobytes())
+            layout[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            offset += array.nbytes
+        f.truncate(max(offset, 1))
+
+    manifest = {
+        "format": PACK_FORMAT_VERSION,
+        "kind": kind,
+        "source": _source_info(source_path) if source_path else None,
+        "arrays": layout,
+        "meta": meta,
+    }
+    with open(pack_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, default=_json_default)
+    return os.path.getsize(bin_path)
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def read_pack(pack_path: str, kind: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Map a pack read-only; arrays are views into the shared mapping (no copy)"""
+    with open(pack_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != PACK_FORMAT_VERSION or manifest.get("kind") != kind:
+        raise ValueError(f"{pack_path} is not a version {PACK_FORMAT_VERSION} '{kind}' pack")
+
+    mapped = np.memmap(_bin_path(pack_path), dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, spec in manifest["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        arrays[name] = np.frombuffer(mapped, dtype=dtype, count=count,
+                                     offset=spec["offset"]).reshape(spec["shape"])
+    return arrays, manifest["meta"]
+
+
+def pack_is_current(pack_path: str, source_path: Optional[str] = None) -> bool:
+    """Whether a pack exists and was exported from the source file as it is now"""
+    if not os.path.exists(pack_path) or not os.path.exists(_bin_path(pack_path)):
+        return False
+    if source_path is None or not os.path.exists(source_path):
+        return True
+    with open(pack_path, "r", encoding="utf-8") as f:
+        source = json.load(f).get("source")
+    current = _source_info(source_path)
+    return bool(source) and source["size"] == current["size"] and source["mtime_ns"] == current["mtime_ns"]
+
+
+# ==================== TREE ENSEMBLES ====================
+
+def flatten_trees(trees: List[Any], normalize: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Concatenate fitted sklearn trees into flat node arrays
+
+    Child indices become global (offset by each tree's first node) and leaves
+    point to themselves, so all trees can be walked together with a fixed
+    number of vectorised steps (the deepest tree's depth).
+    """
+    left, right, feature, threshold, value, roots = [], [], [], [], [], []
+    offset = 0
+    depth = 0
+    for tree in trees:
+        t = tree.tree_
+        is_leaf = t.children_left == -1
+        own = np.arange(t.node_count) + offset
+        left.append(np.where(is_leaf, own, t.children_left + offset))
+        right.append(np.where(is_leaf, own, t.children_right + offset))
+        feature.append(np.where(is_leaf, 0, t.feature))
+        threshold.append(t.threshold)
+        node_value = t.value[:, 0, :]
+        if normalize:
+            node_value = node_value / node_value.sum(axis=1, keepdims=True)
+        value.append(node_value)
+        roots.append(offset)
+        offset += t.node_count
+        depth = max(depth, t.max_depth)
+
+    return {
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "value": np.concatenate(value).astype(np.float64),
+        "roots": np.array(roots, dtype=np.int32),
+        "depth": np.array([depth], dtype=np.int32),
+    }
+
+
+class FlatTreeEnsemble:
+    """Evaluates every tree of an ensemble at once over the flat node arrays"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.depth = int(arrays["depth"][0])
+
+    def leaf_values(self, X) -> np.ndarray:
+        """(n_samples, n_trees, n_outputs) values of the leaf each sample reaches in each tree"""
+        # sklearn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(len(X))[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes]
+
+
+class MappedForestClassifier:
+    """RandomForestClassifier.predict_proba over mapped node arrays"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], classes: List[Any]):
+        self.trees = FlatTreeEnsemble(arrays)
+        self.classes_ = np.array(classes, dtype=object)
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self.trees.leaf_values(X).mean(axis=1)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class MappedGradientBoostingRegressor:
+    """GradientBoostingRegressor.predict (squared error) over mapped node arrays"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], init: float, learning_rate: float):
+        self.trees = FlatTreeEnsemble(arrays)
+        self.init = init
+        self.learning_rate = learning_rate
+
+    def predict(self, X) -> np.ndarray:
+        return self.init + self.learning_rate * self.trees.leaf_values(X)[:, :, 0].sum(axis=1)
+
+
+def flatten_forest_classifier(forest) -> Dict[str, np.ndarray]:
+    return flatten_trees(forest.estimators_, normalize=True)
+
+
+def flatten_gradient_boosting(model) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Node arrays and (init, learning_rate) for a single-output GradientBoostingRegressor"""
+    if getattr(model, "loss", "squared_error") != "squared_error" or model.estimators_.shape[1] != 1:
+        raise ValueError("Only single-output squared-error gradient boosting can be exported")
+    if model.init_ == "zero":
+        init = 0.0
+    elif hasattr(model.init_, "constant_"):
+        init = float(np.ravel(model.init_.constant_)[0])
+    else:
+        raise ValueError(f"Unsupported gradient boosting init estimator: {model.init_!r}")
+    return flatten_trees(model.estimators_[:, 0]), {"init": init, "learning_rate": float(model.learning_rate)}
+
+
+# ==================== SKLEARN PIPELINES ====================
+
+class MappedPipeline:
+    """
+    One-hot/passthrough ColumnTransformer + forest classifier, evaluated with NumPy
+
+    Drop-in for the crop suitability Pipeline's predict_proba(df) / classes_.
+    Unknown categories encode as all zeros (handle_unknown='ignore').
+    """
+
+    def __init__(self, columns: List[Dict[str, Any]], forest: MappedForestClassifier):
+        self.columns = columns
+        self.forest = forest
+        self.classes_ = forest.classes_
+        self._category_index = [
+            {category: i for i, category in enumerate(col["categories"])} if col["onehot"] else None
+            for col in columns
+        ]
+
+    def transform(self, df) -> np.ndarray:
+        blocks = []
+        for col, index in zip(self.columns, self._category_index):
+            values = df[col["name"]].to_numpy()
+            if index is None:
+                blocks.append(values.astype(np.float64)[:, np.newaxis])
+                continue
+            block = np.zeros((len(df), len(index)), dtype=np.float64)
+            positions = np.array([index.get(value, -1) for value in values])
+            known = positions >= 0
+            block[np.flatnonzero(known), positions[known]] = 1.0
+            blocks.append(block)
+        return np.hstack(blocks)
+
+    def predict_proba(self, df) -> np.ndarray:
+        return self.forest.predict_proba(self.transform(df))
+
+    def predict(self, df) -> np.ndarray:
+        return self.forest.predict(self.transform(df))
+
+
+def export_forest_pipeline(pipe, pack_path: str, source_path: Optional[str] = None) -> int:
+    """Export a fitted Pipeline([ColumnTransformer, RandomForestClassifier]) as a mapped pack"""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
+
+    preprocessor, forest = pipe.steps[0][1], pipe.steps[-1][1]
+    if len(pipe.steps) != 2 or not isinstance(preprocessor, ColumnTransformer):
+        raise ValueError("Expected Pipeline([ColumnTransformer, forest classifier])")
+    if preprocessor.remainder != "drop":
+        raise ValueError("ColumnTransformer remainder must be 'drop'")
+
+    columns = []
+    for _, transformer, names in preprocessor.transformers_:
+        if isinstance(transformer, OneHotEncoder):
+            if transformer.handle_unknown != "ignore" or transformer.drop is not None:
+                raise ValueError("OneHotEncoder must use handle_unknown='ignore' and no drop")
+            for name, categories in zip(names, transformer.categories_):
+                columns.append({"name": name, "onehot": True, "categories": categories.tolist()})
+        elif transformer == "passthrough" or (isinstance(transformer, FunctionTransformer) and transformer.func is None):
+            columns.extend({"name": name, "onehot": False, "categories": None} for name in names)
+        elif transformer != "drop":
+            raise ValueError(f"Unsupported transformer: {transformer!r}")
+
+    meta = {"columns": columns, "classes": forest.classes_.tolist()}
+    return write_pack(pack_path, "forest_pipeline", flatten_forest_classifier(forest), meta, source_path)
+
+
+def map_forest_pipeline(pack_path: str) -> MappedPipeline:
+    arrays, meta = read_pack(pack_path, "forest_pipeline")
+    return MappedPipeline(meta["columns"], MappedForestClassifier(arrays, meta["classes"]))
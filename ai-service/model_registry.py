@@ -0,0 +1,196 @@
+"""
+Crop Model Registry
+Lazy, on-demand loading of crop disease models with a memory budget and LRU eviction
+"""
+
+import os
+import gc
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Configuration
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))  # 0 = no limit
+PRELOAD_CROPS = [c.strip() for c in os.getenv("PRELOAD_CROPS", "").split(",") if c.strip()]
+
+
+class CropModel:
+    """
+    A loaded crop model and everything needed to serve predictions from it
+
+    With `load_explainer`, the Keras model and Grad-CAM function are left out
+    until the first explanation needs them (see explainer()); `infer` alone
+    serves classification.
+    """
+
+    def __init__(self, crop_type: str, model, infer: Callable, backend: str, size_bytes: int,
+                 explain: Optional[Callable] = None,
+                 load_explainer: Optional[Callable[[], Tuple[Any, Optional[Callable], int]]] = None):
+        self.crop_type = crop_type
+        self.model = model
+        self.infer = infer
+        self.backend = backend
+        self.explain = explain
+        self.size_bytes = size_bytes
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.hits = 0
+        self._load_explainer = load_explainer
+        self._explainer_lock = threading.Lock()
+
+    @property
+    def explainer_loaded(self) -> bool:
+        return self._load_explainer is None
+
+    def explainer(self) -> Tuple[Any, Optional[Callable]]:
+        """(Keras model, Grad-CAM function), loading them on first use (blocking)"""
+        if self._load_explainer is not None:
+            with self._explainer_lock:
+                if self._load_explainer is not None:
+                    self.model, self.explain, size_bytes = self._load_explainer()
+                    self.size_bytes += size_bytes
+                    self._load_explainer = None
+        return self.model, self.explain
+
+    def touch(self):
+        self.last_used = time.time()
+        self.hits += 1
+
+
+class ModelRegistry:
+    """
+    Loads each crop's model the first time it is requested
+
+    Class indices and disease info are small and cached for the life of the
+    process. Models are kept in LRU order; when the estimated resident size
+    exceeds `memory_budget_mb`, the least recently used crops are evicted.
+    Blocking calls (get/preload) should be made from a worker thread.
+    """
+
+    def __init__(self, load_model: Callable[[str], Optional[CropModel]],
+                 load_metadata: Callable[[str], Optional[Dict[str, Any]]],
+                 crop_types: Iterable[str], memory_budget_mb: float = MODEL_MEMORY_BUDGET_MB):
+        self._load_model = load_model
+        self._load_metadata = load_metadata
+        self.crop_types = list(crop_types)
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+
+        self._entries = OrderedDict()
+        self._metadata = {}
+        self._lock = threading.Lock()
+        self._load_locks = {crop: threading.Lock() for crop in self.crop_types}
+
+        self.loads = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def metadata(self, crop_type: str) -> Optional[Dict[str, Any]]:
+        """Class indices, class names and disease info (loaded once, never evicted)"""
+        with self._lock:
+            if crop_type in self._metadata:
+                return self._metadata[crop_type]
+
+        metadata = self._load_metadata(crop_type)
+        with self._lock:
+            self._metadata[crop_type] = metadata
+        return metadata
+
+    def get(self, crop_type: str) -> Optional[CropModel]:
+        """Return the crop's model, loading it (and evicting others) if needed"""
+        entry = self._lookup(crop_type)
+        if entry is not None:
+            return entry
+
+        load_lock = self._load_locks.get(crop_type)
+        if load_lock is None:
+            return None
+
+        # Only one thread loads a given crop; others wait and reuse its result
+        with load_lock:
+            entry = self._lookup(crop_type)
+            if entry is not None:
+                return entry
+
+            if self.metadata(crop_type) is None:
+                return None
+
+            started = time.perf_counter()
+            entry = self._load_model(crop_type)
+            if entry is None:
+                return None
+
+            with self._lock:
+                self.loads += 1
+                self.load_seconds += time.perf_counter() - started
+                self._entries[crop_type] = entry
+                entry.touch()
+                self._evict_over_budget(keep=crop_type)
+            return entry
+
+    def _lookup(self, crop_type: str) -> Optional[CropModel]:
+        with self._lock:
+            entry = self._entries.get(crop_type)
+            if entry is not None:
+                self._entries.move_to_end(crop_type)
+                entry.touch()
+            return entry
+
+    def _evict_over_budget(self, keep: str):
+        """Drop least recently used models until under budget (caller holds _lock)"""
+        if self.memory_budget_bytes <= 0:
+            return
+
+        evicted = False
+        while self.resident_bytes() > self.memory_budget_bytes:
+            victim = next((crop for crop in self._entries if crop != keep), None)
+            if victim is None:
+                break
+            del self._entries[victim]
+            self.evictions += 1
+            evicted = True
+            print(f"♻️ Evicted {victim} model (LRU, memory budget {self.memory_budget_bytes // (1024 * 1024)} MB)")
+
+        if evicted:
+            gc.collect()
+
+    def evict(self, crop_type: str) -> bool:
+        with self._lock:
+            if self._entries.pop(crop_type, None) is None:
+                return False
+            self.evictions += 1
+        gc.collect()
+        return True
+
+    def preload(self, crop_types: Iterable[str]) -> Dict[str, bool]:
+        return {crop: self.get(crop) is not None for crop in crop_types}
+
+    def is_loaded(self, crop_type: str) -> bool:
+        return crop_type in self._entries
+
+    def peek(self, crop_type: str) -> Optional[CropModel]:
+        """Return a loaded model without loading or touching LRU order"""
+        return self._entries.get(crop_type)
+
+    def resident_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "memory_budget_mb": self.memory_budget_bytes / (1024 * 1024) if self.memory_budget_bytes else None,
+                "resident_mb": round(self.resident_bytes() / (1024 * 1024), 2),
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "total_load_seconds": round(self.load_seconds, 2),
+                "loaded": [
+                    {
+                        "crop": crop,
+                        "backend": entry.backend,
+                        "size_mb": round(entry.size_bytes / (1024 * 1024), 2),
+                        "hits": entry.hits,
+                        "idle_seconds": round(time.time() - entry.last_used, 1),
+                    }
+                    for crop, entry in reversed(self._entries.items())
+                ],
+            }
@@ -0,0 +1,70 @@
+"""
+Model Warm-up
+Synthetic inputs and batch sizes used to warm every serving path before /ready reports ready
+"""
+
+import io
+import os
+import datetime
+from typing import List
+
+import numpy as np
+from PIL import Image
+
+from preprocessing import get_batch_buffer, preprocess_image
+
+# Configuration
+# Comma-separated batch sizes, "all" (1..BATCH_MAX_SIZE), or empty for powers of two up to
+# BATCH_MAX_SIZE plus BATCH_MAX_SIZE and the /predict/batch chunk size; "0" only loads the models
+WARMUP_BATCH_SIZES = os.getenv("WARMUP_BATCH_SIZES", "")
+
+# Representative inputs for the tabular models
+SUITABILITY_WARMUP_PAYLOAD = {
+    "district": "Anuradhapura", "season": "Maha", "soil_ph": 6.3, "soil_type": "Loam",
+    "drainage": "Moderate", "slope": "Flat", "irrigation": True,
+    "rainfall_mm": 1100, "temperature_c": 28, "land_size_ha": 1.0,
+}
+YIELD_WARMUP_AREA_HA = 1.0
+
+
+def get_warmup_batch_sizes(max_batch_size: int, extra_sizes=(), setting: str = WARMUP_BATCH_SIZES) -> List[int]:
+    """Batch sizes to run through each crop model (each new shape pays kernel selection and allocation once)"""
+    setting = setting.strip().lower()
+    if setting == "all":
+        return list(range(1, max_batch_size + 1))
+    if setting:
+        return sorted({int(size) for size in setting.split(",") if int(size) > 0})
+
+    sizes = {max_batch_size, *extra_sizes}
+    size = 1
+    while size < max_batch_size:
+        sizes.add(size)
+        size *= 2
+    return sorted(s for s in sizes if s > 0)
+
+
+def make_warmup_upload(seed: int = 0, size: int = 512) -> bytes:
+    """A synthetic leaf-green JPEG, decoded through the same path as real uploads"""
+    rng = np.random.default_rng(seed)
+    pixels = rng.normal((70, 130, 60), 40, (size, size, 3)).clip(0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def make_warmup_batch(batch_size: int):
+    """
+    Float32 (batch_size, H, W, 3) batch in this thread's reusable buffer, plus the resized image
+
+    Every row is the same preprocessed synthetic upload, so building the
+    largest batch also grows the thread's batch buffer to its serving size.
+    """
+    batch = get_batch_buffer(batch_size)
+    _, image = preprocess_image(make_warmup_upload(), out=batch[0])
+    batch[1:] = batch[0]
+    return batch, image
+
+
+def yield_warmup_query():
+    """(district, season, year) for the yield predictor warm-up: next year's Maha season"""
+    return SUITABILITY_WARMUP_PAYLOAD["district"], "Maha", datetime.date.today().year + 1
@@ -0,0 +1,134 @@
+"""
+Perceptual-Hash Near-Duplicate Index
+dHash fingerprints of uploads and a multi-index hash table for Hamming-distance lookups
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Configuration
+PHASH_INDEX_SIZE = int(os.getenv("PHASH_INDEX_SIZE", "2048"))  # remembered images, 0 = disabled
+PHASH_MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", "4"))  # max differing bits out of 64
+
+HASH_BITS = 64
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    64-bit difference hash: shrink to 9x8 grayscale and compare neighbouring pixels
+    Stable under recompression, resizing and small brightness changes
+    """
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BOX)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateIndex:
+    """
+    Multi-index hash of recently classified images, with LRU eviction
+
+    Each 64-bit hash is split into `num_chunks` chunks and every chunk is an
+    exact-match bucket key. Two hashes within `max_distance` bits differ in at
+    most `max_distance` chunks, so with more chunks than that at least one
+    chunk matches exactly: a lookup only compares candidates from its own
+    buckets. Entries are grouped by namespace (crop, model version, ...), so
+    results never cross crops or models.
+    """
+
+    def __init__(self, max_entries: int = PHASH_INDEX_SIZE, max_distance: int = PHASH_MAX_DISTANCE):
+        self.max_entries = max_entries
+        self.max_distance = max(0, min(int(max_distance), 15))
+
+        # Smallest power-of-two chunk count (up to 16) exceeding max_distance
+        self.num_chunks = 1
+        while self.num_chunks <= self.max_distance:
+            self.num_chunks *= 2
+        self.chunk_bits = HASH_BITS // self.num_chunks
+        self._chunk_mask = (1 << self.chunk_bits) - 1
+
+        self._entries = OrderedDict()  # (namespace, hash) -> value, least recent first
+        self._buckets = {}  # (namespace, chunk index, chunk value) -> set of hashes
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.comparisons = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _bucket_keys(self, namespace: Hashable, image_hash: int):
+        for i in range(self.num_chunks):
+            yield namespace, i, (image_hash >> (i * self.chunk_bits)) & self._chunk_mask
+
+    def lookup(self, namespace: Hashable, image_hash: int) -> Optional[Tuple[Any, int]]:
+        """Return (value, distance) of the closest indexed image within max_distance"""
+        with self._lock:
+            best_hash, best_distance = None, self.max_distance + 1
+            seen = set()
+            for key in self._bucket_keys(namespace, image_hash):
+                for candidate in self._buckets.get(key, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    distance = hamming_distance(image_hash, candidate)
+                    if distance < best_distance:
+                        best_hash, best_distance = candidate, distance
+            self.comparisons += len(seen)
+
+            if best_hash is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end((namespace, best_hash))
+            return self._entries[(namespace, best_hash)], best_distance
+
+    def add(self, namespace: Hashable, image_hash: int, value: Any):
+        if not self.enabled:
+            return
+        with self._lock:
+            entry_key = (namespace, image_hash)
+            if entry_key not in self._entries:
+                for key in self._bucket_keys(namespace, image_hash):
+                    self._buckets.setdefault(key, set()).add(image_hash)
+            self._entries[entry_key] = value
+            self._entries.move_to_end(entry_key)
+
+            while len(self._entries) > self.max_entries:
+                (old_namespace, old_hash), _ = self._entries.popitem(last=False)
+                for key in self._bucket_keys(old_namespace, old_hash):
+                    bucket = self._buckets.get(key)
+                    if bucket is not None:
+                        bucket.discard(old_hash)
+                        if not bucket:
+                            del self._buckets[key]
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "max_distance": self.max_distance,
+                "chunks": self.num_chunks,
+                "buckets": len(self._buckets),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "avg_comparisons": round(self.comparisons / lookups, 2) if lookups else None,
+                "evictions": self.evictions,
+            }
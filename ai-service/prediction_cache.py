@@ -0,0 +1,191 @@
+"""
+Content-Addressed Prediction Cache
+Stores final /predict responses keyed by (SHA-256 of upload, crop, model version, explain mode)
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Configuration
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "256"))  # in-memory entries, 0 = disabled
+PREDICTION_CACHE_DIR = os.getenv("PREDICTION_CACHE_DIR", "")  # empty = no on-disk tier
+PREDICTION_CACHE_DISK_MB = float(os.getenv("PREDICTION_CACHE_DISK_MB", "256"))
+
+
+def hash_upload(source, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of an upload's bytes, or of a binary file object streamed in chunks"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+
+    digest = hashlib.sha256()
+    source.seek(0)
+    for chunk in iter(lambda: source.read(chunk_size), b""):
+        digest.update(chunk)
+    source.seek(0)
+    return digest.hexdigest()
+
+
+def make_cache_key(image_hash: str, crop_type: str, model_version: str, explain: str) -> str:
+    return f"{crop_type}:{model_version}:{explain}:{image_hash}"
+
+
+class PredictionCache:
+    """
+    Two-tier LRU cache of JSON-serializable prediction responses
+
+    The memory tier holds up to `max_entries` responses. If `disk_dir` is set,
+    responses are also written there as JSON files and the oldest files are
+    removed once the directory exceeds `disk_budget_mb`; disk hits are promoted
+    back into memory.
+    """
+
+    def __init__(self, max_entries: int = PREDICTION_CACHE_SIZE, disk_dir: str = PREDICTION_CACHE_DIR,
+                 disk_budget_mb: float = PREDICTION_CACHE_DISK_MB):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir or None
+        self.disk_budget_bytes = int(disk_budget_mb * 1024 * 1024)
+
+        self._memory = OrderedDict()
+        self._disk = OrderedDict()  # file name -> size, oldest first
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._scan_disk()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or self.disk_dir is not None
+
+    def _scan_disk(self):
+        """Rebuild the on-disk index (oldest first) from a previous run"""
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".json"):
+                stat = os.stat(os.path.join(self.disk_dir, name))
+                entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._disk[name] = size
+
+    def _disk_name(self, key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return value
+
+        value = self._read_disk(key)
+        if value is not None:
+            with self._lock:
+                self.disk_hits += 1
+                self._store_memory(key, value)
+            return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self.stores += 1
+            self._store_memory(key, value)
+        self._write_disk(key, value)
+
+    def _store_memory(self, key: str, value: Dict[str, Any]):
+        """Insert into the memory tier (caller holds _lock)"""
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.memory_evictions += 1
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.disk_dir:
+            return None
+        name = self._disk_name(key)
+        with self._lock:
+            if name not in self._disk:
+                return None
+            self._disk.move_to_end(name)
+        try:
+            path = os.path.join(self.disk_dir, name)
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self._disk.pop(name, None)
+            return None
+        # Guard against (astronomically unlikely) file-name collisions
+        return entry["value"] if entry.get("key") == key else None
+
+    def _write_disk(self, key: str, value: Dict[str, Any]):
+        if not self.disk_dir:
+            return
+        name = self._disk_name(key)
+        path = os.path.join(self.disk_dir, name)
+        data = json.dumps({"key": key, "value": value}).encode("utf-8")
+        if len(data) > self.disk_budget_bytes:
+            return
+
+        try:
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Prediction cache write failed: {e}")
+            return
+
+        with self._lock:
+            self._disk[name] = len(data)
+            self._disk.move_to_end(name)
+            victims = []
+            while self.disk_bytes() > self.disk_budget_bytes and len(self._disk) > 1:
+                victim, _ = self._disk.popitem(last=False)
+                victims.append(victim)
+                self.disk_evictions += 1
+        for victim in victims:
+            try:
+                os.remove(os.path.join(self.disk_dir, victim))
+            except OSError:
+                pass
+
+    def disk_bytes(self) -> int:
+        return sum(self._disk.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "max_memory_entries": self.max_entries,
+                "disk_dir": self.disk_dir,
+                "disk_entries": len(self._disk),
+                "disk_mb": round(self.disk_bytes() / (1024 * 1024), 2),
+                "disk_budget_mb": self.disk_budget_bytes / (1024 * 1024) if self.disk_dir else None,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else None,
+                "stores": self.stores,
+                "memory_evictions": self.memory_evictions,
+                "disk_evictions": self.disk_evictions,
+            }
@@ -0,0 +1,113 @@
+"""
+Shared Image Preprocessing
+Decodes uploads and writes normalized float32 model inputs (used by the API and offline scripts)
+"""
+
+import io
+import os
+import threading
+
+import numpy as np
+from PIL import Image
+
+IMAGE_SIZE = (224, 224)
+
+# Reject uploads above this many pixels before decoding (decompression-bomb guard)
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", "50000000"))
+
+PIXEL_SCALE = np.float32(1.0 / 255.0)
+
+_thread_buffers = threading.local()
+
+
+class ImageTooLarge(ValueError):
+    """Upload's declared dimensions exceed MAX_IMAGE_PIXELS"""
+
+
+def decode_image(source, max_pixels: int = MAX_IMAGE_PIXELS):
+    """
+    Decode an upload (bytes or a binary file object) to an RGB image at roughly the model's input size
+
+    Only the header is read before the pixel-budget check. JPEGs are then
+    decoded in draft mode, where libjpeg scales by 1/2, 1/4 or 1/8 in the DCT
+    domain while staying at least IMAGE_SIZE, so a 12 MP phone photo never
+    materializes at full resolution. File objects (e.g. a spooled upload) are
+    read in place from their start rather than copied into memory first.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    else:
+        source.seek(0)
+    image = Image.open(source)
+
+    width, height = image.size
+    if width * height > max_pixels:
+        raise ImageTooLarge(f"Image is {width}x{height} pixels; the limit is {max_pixels} pixels")
+
+    # No-op for formats without reduced-resolution decoding
+    image.draft('RGB', IMAGE_SIZE)
+
+    # Convert to RGB if necessary
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    return image
+
+
+def load_image(source):
+    """Decode and resize an upload to IMAGE_SIZE (uint8 RGB)"""
+    image = decode_image(source)
+
+    # Box-reduce by an integer factor first, then LANCZOS over the remainder
+    return image.resize(IMAGE_SIZE, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+
+def normalize_into(image, out: np.ndarray) -> np.ndarray:
+    """Write uint8 pixels scaled to [0, 1] into a float32 (H, W, 3) array in one pass"""
+    return np.multiply(np.asarray(image), PIXEL_SCALE, out=out)
+
+
+def preprocess_image(source, out: np.ndarray = None):
+    """
+    Preprocess image for model prediction
+
+    Returns a float32 (1, H, W, 3) array and the resized PIL image. Pass `out`
+    (a float32 (H, W, 3) view, e.g. one row of a batch buffer) to fill it in
+    place instead of allocating.
+    """
+    image = load_image(source)
+
+    if out is None:
+        out = np.empty((*IMAGE_SIZE, 3), dtype=np.float32)
+    normalize_into(image, out)
+
+    # Add batch dimension (a view, no copy)
+    return out[np.newaxis], image
+
+
+def get_batch_buffer(batch_size: int) -> np.ndarray:
+    """
+    Preallocated float32 (batch_size, H, W, 3) buffer owned by the calling thread
+
+    Grows on demand and is reused on every call, so the contents are only
+    valid until the same thread asks for a buffer again.
+    """
+    buffer = getattr(_thread_buffers, "batch", None)
+    if buffer is None or len(buffer) < batch_size:
+        buffer = np.empty((batch_size, *IMAGE_SIZE, 3), dtype=np.float32)
+        _thread_buffers.batch = buffer
+    return buffer[:batch_size]
+
+
+def preprocess_batch(images_bytes, out: np.ndarray = None) -> np.ndarray:
+    """
+    Preprocess several images into one float32 batch
+
+    Writes into `out` if given, otherwise into this thread's reusable buffer
+    (see get_batch_buffer).
+    """
+    if out is None:
+        out = get_batch_buffer(len(images_bytes))
+    for row, image_bytes in zip(out, images_bytes):
+        preprocess_image(image_bytes, out=row)
+    return out
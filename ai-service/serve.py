@@ -0,0 +1,160 @@
+"""
+Pre-fork API Server
+Loads shared state once in a master process and forks uvicorn workers that inherit it copy-on-write
+"""
+
+import os
+import gc
+import time
+import signal
+import socket
+import argparse
+import tempfile
+
+import uvicorn
+
+# Configuration
+SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.getenv("SERVE_PORT", "8000"))
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "1"))
+SERVE_TF_THREADS = int(os.getenv("SERVE_TF_THREADS", "0"))  # intra-op threads per worker, 0 = cores / workers
+
+# Restart a worker that exits this soon after starting only after a pause (avoids a crash loop)
+MIN_WORKER_LIFETIME = 10.0
+
+
+def preload_shared_state(api):
+    """
+    Load everything that can safely cross fork() before any worker starts
+
+    Crop metadata, the crop suitability pipeline and the yield predictor are
+    plain Python / NumPy objects, so workers share their pages until they
+    write to them; TensorFlow and Keras are imported (but run no ops) so their
+    modules are shared too.
+
+    Crop disease models are NOT loaded here and are not shared: a Keras model
+    loaded before fork() deadlocks the child's first inference (TF's thread
+    pools do not survive fork), whether or not the master ran it. Each worker
+    loads its own, so every extra worker pays for a full copy of their weights.
+    """
+    for crop in api.MODELS_CONFIG:
+        api.model_registry.metadata(crop)
+    api.startup_profile.import_module("tensorflow")
+    api.startup_profile.import_module("keras")
+    api.warm_up_subsystems(crop_types=[])
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(api, sock: socket.socket, tf_threads: int):
+    """Worker process body: configure TensorFlow, then serve the inherited socket"""
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+
+    # Must happen before the worker's first TF op initializes the runtime
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+
+    config = uvicorn.Config(api.app, log_level="info")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn_worker(api, sock: socket.socket, tf_threads: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(api, sock, tf_threads)
+        except BaseException as e:
+            print(f"❌ Worker {os.getpid()} failed: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def serve(workers: int, host: str, port: int, tf_threads: int):
+    print("=" * 60)
+    print("🌾🍵 Govi Isuru - Pre-fork API Server")
+    print(f"   {workers} worker(s) on {host}:{port}, {tf_threads} TF thread(s) each")
+    print("=" * 60)
+
+    # Any worker may be polled for an explanation another worker computed
+    if workers > 1 and not os.getenv("EXPLAIN_SHARED_DIR"):
+        os.environ["EXPLAIN_SHARED_DIR"] = os.path.join(tempfile.gettempdir(), "govi-isuru-explanations")
+
+    started = time.perf_counter()
+    import main as api
+    preload_shared_state(api)
+
+    # Move everything loaded so far out of the collector's reach: a GC pass in a
+    # worker would otherwise write to (and so un-share) every tracked object
+    gc.collect()
+    gc.freeze()
+    print(f"🧊 Shared state ready in {time.perf_counter() - started:.1f}s ({gc.get_freeze_count()} objects frozen)")
+
+    sock = bind_socket(host, port)
+    children = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        children[spawn_worker(api, sock, tf_threads)] = time.monotonic()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+
+        spawned_at = children.pop(pid, None)
+        if spawned_at is None or stopping:
+            continue
+
+        print(f"⚠️ Worker {pid} exited (status {status}), restarting")
+        if time.monotonic() - spawned_at < MIN_WORKER_LIFETIME:
+            time.sleep(MIN_WORKER_LIFETIME)
+        if not stopping:
+            children[spawn_worker(api, sock, tf_threads)] = time.monotonic()
+
+    sock.close()
+    print("👋 All workers stopped")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--tf-threads", type=int, default=SERVE_TF_THREADS,
+                        help="TensorFlow intra-op threads per worker (0 = cores / workers)")
+    args = parser.parse_args()
+
+    workers = max(args.workers, 1)
+    tf_threads = args.tf_threads or max((os.cpu_count() or 1) // workers, 1)
+    serve(workers, args.host, args.port, tf_threads)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,183 @@
+"""
+Startup Profiling and Readiness
+Per-import / per-loader startup timings and the warmed state of each serving subsystem
+"""
+
+import re
+import sys
+import time
+import argparse
+import importlib
+import threading
+import subprocess
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+# Subsystem states; a process is ready once no subsystem is still "pending" or "loading".
+# A "failed" subsystem does not hold readiness back: the process serves degraded and
+# only that subsystem's routes answer 503 (they retry the load on request)
+PENDING, LOADING, READY, FAILED, DISABLED = "pending", "loading", "ready", "failed", "disabled"
+SETTLED_STATES = (READY, FAILED, DISABLED)
+
+
+class StartupProfile:
+    """
+    Records how long imports and loaders take, and what each subsystem is doing
+
+    Subsystems (crop disease models, crop suitability, yield predictor) are
+    registered as pending and move through loading to ready or failed as the
+    background load and warm-up runs, so liveness can be answered immediately while
+    readiness waits for the models. Failed subsystems are listed as degraded
+    rather than keeping the process out of rotation.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.timings = []
+        self.subsystems = OrderedDict()
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    @contextmanager
+    def timed(self, kind: str, name: str):
+        """Time a block as an import, loader or warm-up step"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.timings.append({
+                    "kind": kind,
+                    "name": name,
+                    "started_s": round(started - self._started, 3),
+                    "seconds": round(time.perf_counter() - started, 3),
+                })
+
+    def import_module(self, name: str):
+        """Import a (heavy) module, timing it the first time"""
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        with self.timed("import", name):
+            return importlib.import_module(name)
+
+    def register(self, name: str, state: str = PENDING, detail: str = None):
+        """Add a subsystem (no-op if already known, e.g. warmed before a fork)"""
+        with self._lock:
+            self.subsystems.setdefault(name, {"state": state, "detail": detail, "seconds": None})
+
+    def set_state(self, name: str, state: str, detail: str = None):
+        with self._lock:
+            entry = self.subsystems.setdefault(name, {"state": state, "detail": None, "seconds": None})
+            entry["state"] = state
+            entry["detail"] = detail
+
+    @contextmanager
+    def warming(self, name: str):
+        """Mark a subsystem loading for the duration of the block, then ready (or failed, re-raising)"""
+        self.set_state(name, LOADING)
+        started = time.perf_counter()
+        try:
+            with self.timed("loader", name):
+                yield
+        except Exception as e:
+            self.set_state(name, FAILED, str(e))
+            raise
+        else:
+            self.set_state(name, READY)
+        finally:
+            with self._lock:
+                self.subsystems[name]["seconds"] = round(time.perf_counter() - started, 3)
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return all(s["state"] in SETTLED_STATES for s in self.subsystems.values())
+
+    def readiness(self) -> Dict[str, Any]:
+        with self._lock:
+            subsystems = {name: dict(s) for name, s in self.subsystems.items()}
+        return {
+            "ready": all(s["state"] in SETTLED_STATES for s in subsystems.values()),
+            "degraded": [name for name, s in subsystems.items() if s["state"] == FAILED],
+            "uptime_seconds": round(self.elapsed(), 1),
+            "subsystems": subsystems,
+        }
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            timings = list(self.timings)
+        return {
+            **self.readiness(),
+            "started_at": self.started_at,
+            "imports": [t for t in timings if t["kind"] == "import"],
+            "loaders": [t for t in timings if t["kind"] == "loader"],
+            "warmups": [t for t in timings if t["kind"] == "warmup"],
+        }
+
+
+startup_profile = StartupProfile()
+
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_imports(module: str = "main") -> List[Dict[str, Any]]:
+    """Run `python -X importtime -c "import <module>"` and parse its per-module timings"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append({
+                "name": name,
+                "depth": (len(indent) - 1) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            })
+    return imports
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top", type=int, default=20, help="Slowest imports to list")
+    parser.add_argument("--skip-loaders", action="store_true", help="Only profile imports")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("⏱️ Startup Profile")
+    print("=" * 60)
+
+    imports = profile_imports("main")
+    total = next((i["cumulative_ms"] for i in imports if i["name"] == "main"), None)
+    if total is not None:
+        print(f"\n📦 import main: {total:.0f} ms")
+    print(f"\n🐢 Slowest imports (cumulative, incl. dependencies):")
+    for entry in sorted(imports, key=lambda i: i["cumulative_ms"], reverse=True)[:args.top]:
+        print(f"   {entry['cumulative_ms']:9.1f} ms  {'  ' * entry['depth']}{entry['name']}")
+
+    if args.skip_loaders:
+        return
+
+    # Same warm-up the service runs in the background after startup
+    import main
+    main.warm_up_subsystems()
+
+    report = main.startup_profile.report()
+    print(f"\n🔥 Warm-up (after import):")
+    for entry in sorted(report["imports"] + report["loaders"] + report["warmups"], key=lambda t: t["started_s"]):
+        print(f"   {entry['seconds'] * 1000:9.1f} ms  {entry['kind']:6s} {entry['name']}")
+    print(f"\n🚦 Subsystems:")
+    for name, subsystem in report["subsystems"].items():
+        detail = f" ({subsystem['detail']})" if subsystem["detail"] else ""
+        print(f"   {name:24s} {subsystem['state']}{detail}")
+
+
+if __name__ == "__main__":
+    main_cli()
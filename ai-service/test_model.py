@@ -6,14 +6,13 @@ import os
 import json
 import random
 import numpy as np
-import tensorflow as tf
 from tensorflow import keras
-from PIL import Image
+
+from preprocessing import preprocess_image, get_batch_buffer
 
 MODEL_PATH = "models/rice_disease_model.keras"
 CLASS_INDICES_PATH = "models/class_indices.json"
 DATASET_PATH = "../dataset/test"
-IMAGE_SIZE = (224, 224)
 
 def load_and_test():
     """Load model and test on random images from test set"""
@@ -69,11 +68,9 @@ def load_and_test():
         for img_name in test_images:
             img_path = os.path.join(class_path, img_name)
             
-            # Load and preprocess image
-            img = Image.open(img_path).convert('RGB')
-            img = img.resize(IMAGE_SIZE, Image.Resampling.LANCZOS)
-            img_array = np.array(img) / 255.0
-            img_array = np.expand_dims(img_array, axis=0)
+            # Load and preprocess image (same pipeline as the API, into a reused float32 buffer)
+            with open(img_path, 'rb') as f:
+                img_array, _ = preprocess_image(f.read(), out=get_batch_buffer(1)[0])
             
             # Predict
             predictions = model.predict(img_array, verbose=0)[0]
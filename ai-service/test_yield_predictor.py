@@ -0,0 +1,59 @@
+"""
+Regression tests for the memory-mapped yield predictor pack
+
+Run from ai-service/: python -m pytest -q test_yield_predictor.py
+"""
+
+from pathlib import Path
+
+import pytest
+
+from yield_predictor import YieldPredictor
+
+BASE_DIR = Path(__file__).parent
+MODEL_PATH = BASE_DIR / "models" / "yield_predictor.pkl"
+DATA_PATH = BASE_DIR / "paddy_data" / "paddy_statistics.json"
+
+pytestmark = pytest.mark.skipif(
+    not (MODEL_PATH.exists() and DATA_PATH.exists()),
+    reason="trained yield model or paddy statistics not available"
+)
+
+
+def load_serving(load):
+    """Same order as main.get_yield_predictor: model, historical data, forecast table"""
+    predictor = YieldPredictor()
+    load(predictor)
+    predictor.load_data(DATA_PATH)
+    predictor.build_forecast_table()
+    return predictor
+
+
+def test_mapped_pack_serves_like_pickle(tmp_path):
+    pack_path = tmp_path / "yield_predictor.pack.json"
+    source = YieldPredictor()
+    source.load_model(MODEL_PATH)
+    source.save_mapped_model(pack_path, MODEL_PATH)
+
+    pickled = load_serving(lambda p: p.load_model(MODEL_PATH))
+    mapped = load_serving(lambda p: p.load_mapped_model(pack_path))
+
+    districts = pickled.features.districts
+    seasons = pickled.features.seasons
+    assert mapped.features.districts == districts
+    for district in districts:
+        for season in seasons:
+            for year in (2024, 2025, 2026):
+                expected = pickled.predict(district, season, year)
+                assert mapped.predict(district, season, year) == expected
+                assert mapped.predict_profit(district, season, year, 2.0) == \
+                    pickled.predict_profit(district, season, year, 2.0)
+
+
+def test_batch_profit_has_every_scalar_key():
+    predictor = load_serving(lambda p: p.load_model(MODEL_PATH))
+    single = predictor.predict_profit("Kandy", "Maha", 2025, 2.0)
+    columns = predictor.predict_profit_many(["Kandy"], ["Maha"], [2025], [2.0])
+    assert set(single) <= set(columns)
+    for key, value in single.items():
+        assert columns[key].tolist()[0] == value, key
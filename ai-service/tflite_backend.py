@@ -0,0 +1,125 @@
+"""
+TFLite Inference Backend for Crop Disease Models
+Serves float16 / int8 quantized exports of the Keras models from a pool of interpreters
+"""
+
+import os
+import queue
+import bisect
+from typing import Dict, Iterable
+
+import numpy as np
+import tensorflow as tf
+
+# Configuration
+TFLITE_PRECISION = os.getenv("TFLITE_PRECISION", "float16")  # float16 | int8
+TFLITE_POOL_SIZE = int(os.getenv("TFLITE_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+TFLITE_NUM_THREADS = int(os.getenv("TFLITE_NUM_THREADS", "1"))
+TFLITE_PRECISIONS = ("float16", "int8")
+
+
+def get_tflite_path(keras_model_path: str, precision: str = TFLITE_PRECISION) -> str:
+    """models/tea/tea_best_model.keras -> models/tea/tea_best_model.float16.tflite"""
+    return f"{os.path.splitext(keras_model_path)[0]}.{precision}.tflite"
+
+
+class TFLiteInterpreterPool:
+    """
+    Pool of tf.lite.Interpreter instances for one model, allocated per batch size
+
+    An interpreter is not thread-safe, so each call checks one out of the pool
+    and returns it afterwards. Every batch size in `batch_sizes` gets `size`
+    interpreters allocated for that input shape up front, so a call never
+    resizes and reallocates tensors: a batch is padded to the smallest
+    allocated size that fits, and larger batches run in chunks of the largest.
+    """
+
+    def __init__(self, model_path: str, size: int = TFLITE_POOL_SIZE,
+                 num_threads: int = TFLITE_NUM_THREADS, batch_sizes: Iterable[int] = (1,)):
+        self.model_path = model_path
+        self.size = max(int(size), 1)
+        self.batch_sizes = sorted({int(n) for n in batch_sizes if int(n) > 0}) or [1]
+        self._pools = {}
+        for batch_size in self.batch_sizes:
+            self._pools[batch_size] = queue.Queue()
+            for _ in range(self.size):
+                interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+                input_details = interpreter.get_input_details()[0]
+                if input_details["shape"][0] != batch_size:
+                    interpreter.resize_tensor_input(input_details["index"], [batch_size, *input_details["shape"][1:]])
+                interpreter.allocate_tensors()
+                self._pools[batch_size].put(interpreter)
+
+    @property
+    def interpreter_count(self) -> int:
+        return self.size * len(self.batch_sizes)
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """Run a float32 (N, H, W, 3) batch and return class probabilities"""
+        batch = batch.astype(np.float32, copy=False)
+        largest = self.batch_sizes[-1]
+        if len(batch) > largest:
+            return np.concatenate([self._run(batch[start:start + largest])
+                                   for start in range(0, len(batch), largest)])
+        return self._run(batch)
+
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        count = len(batch)
+        batch_size = self.batch_sizes[bisect.bisect_left(self.batch_sizes, count)]
+        if batch_size != count:
+            padding = np.zeros((batch_size - count, *batch.shape[1:]), dtype=np.float32)
+            batch = np.concatenate([batch, padding])
+
+        pool = self._pools[batch_size]
+        interpreter = pool.get()
+        try:
+            input_details = interpreter.get_input_details()[0]
+            output_details = interpreter.get_output_details()[0]
+            interpreter.set_tensor(input_details["index"], batch)
+            interpreter.invoke()
+            return interpreter.get_tensor(output_details["index"])[:count].copy()
+        finally:
+            pool.put(interpreter)
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        return self.predict(batch)
+
+    def info(self) -> Dict[str, object]:
+        return {
+            "model_path": self.model_path,
+            "pool_size": self.size,
+            "batch_sizes": self.batch_sizes,
+            "model_size_mb": round(os.path.getsize(self.model_path) / (1024 * 1024), 2),
+        }
+
+
+def convert_to_tflite(inference_fn, model, precision: str, representative_images=None) -> bytes:
+    """
+    Convert a compiled inference tf.function to a TFLite flatbuffer
+
+    - float16: weights stored as float16, computed in float32
+    - int8: full integer quantization calibrated on `representative_images`
+      (input and output stay float32 so serving code is unchanged)
+    """
+    if precision not in TFLITE_PRECISIONS:
+        raise ValueError(f"Unsupported TFLite precision: {precision}")
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions(
+        [inference_fn.get_concrete_function()], model
+    )
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if precision == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    else:
+        if representative_images is None:
+            raise ValueError("int8 quantization needs representative images")
+
+        def representative_dataset():
+            for image in representative_images:
+                yield [np.expand_dims(image, axis=0).astype(np.float32)]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    return converter.convert()
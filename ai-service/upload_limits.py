@@ -0,0 +1,148 @@
+"""
+Upload Size Limits
+ASGI middleware that caps each request body and the total bytes of uploads in flight
+"""
+
+import os
+import json
+import threading
+from typing import Any, Dict
+
+from inference_executor import INFERENCE_RETRY_AFTER
+
+# Configuration
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "15"))
+MAX_INFLIGHT_UPLOAD_MB = float(os.getenv("MAX_INFLIGHT_UPLOAD_MB", "256"))
+MAX_BATCH_UPLOAD_MB = float(os.getenv("MAX_BATCH_UPLOAD_MB", "200"))
+
+MB = 1024 * 1024
+
+
+class InflightBytes:
+    """Global budget of request-body bytes being received or processed"""
+
+    def __init__(self, max_mb: float = MAX_INFLIGHT_UPLOAD_MB):
+        self.max_bytes = int(max_mb * MB)
+        self.in_flight = 0
+        self.peak = 0
+        self.rejected = 0
+        self.too_large = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, nbytes: int) -> bool:
+        with self._lock:
+            if self.in_flight + nbytes > self.max_bytes and self.in_flight > 0:
+                self.rejected += 1
+                return False
+            self.in_flight += nbytes
+            self.peak = max(self.peak, self.in_flight)
+            return True
+
+    def release(self, nbytes: int):
+        with self._lock:
+            self.in_flight -= nbytes
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_inflight_mb": self.max_bytes / MB,
+            "inflight_mb": round(self.in_flight / MB, 2),
+            "peak_inflight_mb": round(self.peak / MB, 2),
+            "rejected": self.rejected,
+            "rejected_too_large": self.too_large,
+        }
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadLimitMiddleware:
+    """
+    Reject oversize request bodies before they are buffered
+
+    A declared Content-Length over `max_request_mb` gets 413 without reading
+    the body. Chunked bodies are counted as they stream in and cut off with
+    413 as soon as they pass the limit. Each request reserves its declared
+    size (or the per-request limit if unknown) from `budget` until the
+    response is sent; when the budget is exhausted the request gets 503 with
+    Retry-After. `path_limits_mb` overrides the limit for specific paths.
+    """
+
+    def __init__(self, app, max_request_mb: float = MAX_UPLOAD_MB, budget: InflightBytes = None,
+                 retry_after: int = INFERENCE_RETRY_AFTER, path_limits_mb: Dict[str, float] = None):
+        self.app = app
+        self.max_request_bytes = int(max_request_mb * MB)
+        self.path_limits = {path: int(mb * MB) for path, mb in (path_limits_mb or {}).items()}
+        self.budget = budget if budget is not None else InflightBytes()
+        self.retry_after = retry_after
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = self.path_limits.get(scope["path"], self.max_request_bytes)
+        content_length = None
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    content_length = int(value)
+                except ValueError:
+                    pass
+                break
+
+        if content_length is not None and content_length > max_bytes:
+            self.budget.too_large += 1
+            await self._reject(send, 413, self._too_large_detail(max_bytes))
+            return
+
+        reserved = content_length if content_length is not None else max_bytes
+        if not self.budget.try_acquire(reserved):
+            await self._reject(send, 503, "Too many uploads in progress. Please retry shortly.",
+                               headers=[(b"retry-after", str(self.retry_after).encode())])
+            return
+
+        state = {"received": 0, "started": False, "rejected": False}
+
+        async def limited_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["received"] += len(message.get("body", b""))
+                if state["received"] > max_bytes:
+                    self.budget.too_large += 1
+                    if not state["started"]:
+                        await self._reject(send, 413, self._too_large_detail(max_bytes))
+                    state["rejected"] = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            # Drop whatever the app sends after we have already answered 413
+            if state["rejected"]:
+                return
+            if message["type"] == "http.response.start":
+                state["started"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            pass
+        finally:
+            self.budget.release(reserved)
+
+    def _too_large_detail(self, max_bytes: int) -> str:
+        return f"Upload too large. The limit is {max_bytes / MB:g} MB."
+
+    async def _reject(self, send, status: int, detail: str, headers=None):
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *(headers or []),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -4,6 +4,9 @@ Machine Learning model for predicting paddy yield, profit, and generating early
 """
 
 import json
+import zlib
+import bisect
+import threading
 import numpy as np
 import pandas as pd
 from pathlib import Path
@@ -13,7 +16,7 @@ import pickle
 # Try to import ML libraries
 try:
     from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-    from sklearn.preprocessing import LabelEncoder, StandardScaler
+    from sklearn.preprocessing import StandardScaler
     from sklearn.model_selection import train_test_split, cross_val_score
     from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
     ML_AVAILABLE = True
@@ -57,17 +60,328 @@ TOTAL_COST_PER_HA = sum(PRODUCTION_COSTS.values())  # ~168,000 Rs/ha
 # Average paddy price (Rs/kg)
 PADDY_PRICE_PER_KG = 85  # 2024 average
 
+# Forecast table: every district x season x year in the grid is predicted in one batch
+FORECAST_SEASONS = ('Maha', 'Yala')
+FORECAST_HORIZON_YEARS = 5  # years either side of the current year
+MAX_FORECAST_SPAN = 100  # the grid grows on demand up to this many years
+FORECAST_METHODS = ('ml_model', 'statistical', 'historical_average')
+METHOD_NAMES = np.array(FORECAST_METHODS, dtype=object)
+
+# Yield confidence by historical coefficient of variation: < 0.1, < 0.2, otherwise
+CONFIDENCE_LEVELS = np.array(['high', 'medium', 'low'], dtype=object)
+
+
+def round_scaled(value, decimals):
+    """Round a float like np.round (scale, round half to even, unscale), so scalar and vectorised results agree"""
+    scale = 10.0 ** decimals
+    return round(value * scale) / scale
+
+
+def district_key(district):
+    """Stable per-district RNG key (str hash() is salted per process)"""
+    return zlib.crc32(district.encode('utf-8'))
+
+
+def counter_uniform(keys, counters, low, high):
+    """
+    Vectorised counter-based uniform draws in [low, high)
+    
+    Each (key, counter) pair goes through the SplitMix64 mixer, so a draw
+    depends only on its inputs: no generator state or per-call seeding, and
+    the same value in every process.
+    """
+    with np.errstate(over='ignore'):
+        x = np.asarray(keys, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        x += np.asarray(counters).astype(np.uint64)
+        x ^= x >> np.uint64(30)
+        x *= np.uint64(0xBF58476D1CE4E5B9)
+        x ^= x >> np.uint64(27)
+        x *= np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(31)
+    return low + (high - low) * ((x >> np.uint64(11)).astype(np.float64) * 2.0 ** -53)
+
+
+class ForecastTable:
+    """Predicted yields for a district x season x year grid, answered by array indexing"""
+    
+    def __init__(self, districts, first_year, yields, methods):
+        self.districts = list(districts)
+        self.district_index = {district: i for i, district in enumerate(self.districts)}
+        self.first_year = int(first_year)
+        self.yields = yields    # float64 (districts, seasons, years)
+        self.methods = methods  # uint8 (districts, seasons, years), index into FORECAST_METHODS
+    
+    @property
+    def last_year(self):
+        return self.first_year + self.yields.shape[2] - 1
+    
+    def covers(self, year):
+        return self.first_year <= year <= self.last_year
+
+
+def get_climate_zone(district):
+    """Climate zone for a district ("Unknown" if not listed)"""
+    for zone, districts in CLIMATE_ZONES.items():
+        if district in districts:
+            return zone
+    return "Unknown"
+
+
+class YieldFeaturePipeline:
+    """
+    Fit-once feature encoding for the yield model
+    
+    Learns the district, season and climate-zone codes from the training data
+    and the mean harvested area of each (district, season). Training rows and
+    forecast cells are then encoded by indexing; nothing is refitted at
+    prediction time.
+    """
+    
+    FEATURE_NAMES = [
+        'district_encoded', 'season_encoded', 'climate_zone_encoded',
+        'year_normalized', 'prev_yield', 'rolling_yield_3yr',
+        'harvested_area_ha'
+    ]
+    
+    def __init__(self, districts=(), seasons=()):
+        # Sorted, so codes match the LabelEncoders of models trained before the pipeline
+        self.districts = sorted(districts)
+        self.seasons = sorted(seasons)
+        self.district_index = {d: i for i, d in enumerate(self.districts)}
+        self.season_index = {s: i for i, s in enumerate(self.seasons)}
+        zones = [get_climate_zone(d) for d in self.districts]
+        climate_classes = sorted(set(zones))
+        self.climate_codes = np.array([climate_classes.index(z) for z in zones], dtype=np.int64)
+        self.area = np.full((len(self.districts), len(self.seasons)), np.nan)
+    
+    @classmethod
+    def fit(cls, df):
+        pipeline = cls(df['district'].unique().tolist(), df['season'].unique().tolist())
+        pipeline.fit_history(df)
+        return pipeline
+    
+    @property
+    def has_history(self):
+        return bool(self.area.size) and not np.isnan(self.area).all()
+    
+    def fit_history(self, df):
+        """Mean harvested area of each known (district, season) in `df`"""
+        df = df[df['district'].isin(self.district_index) & df['season'].isin(self.season_index)]
+        if 'harvested_area_ha' not in df:
+            return
+        for (district, season), value in df.groupby(['district', 'season'])['harvested_area_ha'].mean().items():
+            self.area[self.district_index[district], self.season_index[season]] = value
+    
+    def transform(self, df):
+        """Features for historical rows (training): lag and rolling yields come from the rows themselves"""
+        district_codes = df['district'].map(self.district_index)
+        features = pd.DataFrame({
+            'district_encoded': district_codes,
+            'season_encoded': df['season'].map(self.season_index),
+            'climate_zone_encoded': district_codes.map(lambda i: self.climate_codes[int(i)], na_action='ignore'),
+            'year_normalized': (df['year'] - 2015) / 10,
+            'harvested_area_ha': df['harvested_area_ha'],
+        }, index=df.index)
+        
+        # Lagged yield (previous year's yield for same district/season)
+        by_group = df.groupby(['district', 'season'])['yield_kg_ha']
+        features['prev_yield'] = by_group.shift(1).fillna(df['yield_kg_ha'].mean())
+        
+        # Rolling mean
+        features['rolling_yield_3yr'] = by_group.transform(lambda x: x.rolling(3, min_periods=1).mean())
+        return features[self.FEATURE_NAMES]
+    
+    def forecast_features(self, district_codes, season_codes, years, avg_yield, default_area):
+        """
+        Features for forecast cells, by indexing the fitted lookups
+        
+        Future years have no observed lag, so the lag and rolling yields are
+        the district's average yield (`avg_yield`, per row); `default_area`
+        fills in for (district, season) pairs without a known area.
+        """
+        area = self.area[district_codes, season_codes]
+        return pd.DataFrame({
+            'district_encoded': district_codes,
+            'season_encoded': season_codes,
+            'climate_zone_encoded': self.climate_codes[district_codes],
+            'year_normalized': (years - 2015) / 10,
+            'prev_yield': avg_yield,
+            'rolling_yield_3yr': avg_yield,
+            'harvested_area_ha': np.where(np.isnan(area), default_area, area),
+        })
+    
+    def state(self):
+        """Plain lists and arrays for pickling or a memory-mapped pack"""
+        return {
+            'districts': self.districts,
+            'seasons': self.seasons,
+            'area': self.area,
+        }
+    
+    def copy(self):
+        """An independent copy (from_state copies the arrays)"""
+        return YieldFeaturePipeline.from_state(self.state())
+    
+    @classmethod
+    def from_state(cls, state):
+        pipeline = cls(state['districts'], state['seasons'])
+        if state.get('area') is not None:
+            # A copy: a mapped pack's view is read-only, and load_data may refit the area lookup
+            pipeline.area = np.array(state['area'], dtype=np.float64, copy=True)
+        return pipeline
+
+
+# Yield change (kg/ha per year) beyond which a district's trend is increasing / declining
+TREND_THRESHOLD_KG_HA = 20
+
+
+class DistrictStatsEngine:
+    """
+    Per-district yield statistics from running sums, updated record by record
+    
+    Uses the formulas of the precomputed DCS statistics (generate_paddy_data.py):
+    sample standard deviation, and a trend that is the least-squares slope of
+    the yearly average yields relative to the mean. `fit` builds every
+    district's accumulators in one groupby pass; `with_records` folds new
+    records in with Welford updates for mean and variance, running min/max, a
+    sorted yield list (bisect.insort) for the median and running sums over the
+    yearly averages for the trend, so a new season costs O(new records) rather
+    than a pass over the history.
+    """
+    
+    def __init__(self, accumulators=None):
+        self.accumulators = accumulators or {}
+    
+    @classmethod
+    def fit(cls, df):
+        frame = pd.DataFrame({
+            'district': df['district'],
+            'year': df['year'].astype(np.int64),
+            'y': df['yield_kg_ha'].astype(np.float64),
+        })
+        
+        # Sorting by yield once gives every district's sorted yield list from the same groupby
+        grouped = frame.sort_values('y', kind='stable').groupby('district', sort=False)
+        agg = grouped.agg(n=('y', 'size'), mean=('y', 'mean'), var=('y', 'var'), min=('y', 'min'), max=('y', 'max'))
+        agg['m2'] = (agg['var'] * (agg['n'] - 1)).fillna(0.0)  # var is the sample variance (n - 1)
+        agg['sorted_yields'] = grouped['y'].agg(list)
+        
+        # Trend sums over each district's yearly average yields
+        yearly = frame.groupby(['district', 'year'])['y'].agg(['sum', 'count']).reset_index()
+        yearly['x'] = yearly['year'].astype(np.float64)
+        yearly['avg'] = yearly['sum'] / yearly['count']
+        yearly['xy'] = yearly['x'] * yearly['avg']
+        yearly['x2'] = yearly['x'] * yearly['x']
+        trend = yearly.groupby('district').agg(t_n=('x', 'size'), sum_x=('x', 'sum'), sum_y=('avg', 'sum'),
+                                               sum_xy=('xy', 'sum'), sum_x2=('x2', 'sum'))
+        
+        accumulators = agg.drop(columns='var').join(trend).to_dict('index')
+        for acc in accumulators.values():
+            acc['n'] = int(acc['n'])
+            acc['t_n'] = int(acc['t_n'])
+            acc['years'] = {}
+        for district, year, total, count in yearly[['district', 'year', 'sum', 'count']].itertuples(index=False):
+            accumulators[district]['years'][int(year)] = [float(total), int(count)]
+        return cls(accumulators)
+    
+    def with_records(self, df):
+        """
+        A new engine with `df` folded in, and the districts it touched
+        
+        This engine is left unchanged; untouched districts share their
+        accumulators with it.
+        """
+        accumulators = dict(self.accumulators)
+        touched = list(dict.fromkeys(df['district']))
+        for district in touched:
+            acc = accumulators.get(district)
+            if acc is None:
+                accumulators[district] = {
+                    'n': 0, 'mean': 0.0, 'm2': 0.0, 'min': np.inf, 'max': -np.inf, 'sorted_yields': [],
+                    't_n': 0, 'sum_x': 0.0, 'sum_y': 0.0, 'sum_xy': 0.0, 'sum_x2': 0.0, 'years': {},
+                }
+            else:
+                accumulators[district] = {**acc, 'sorted_yields': list(acc['sorted_yields']),
+                                          'years': {year: list(v) for year, v in acc['years'].items()}}
+        
+        for district, year, value in zip(df['district'], df['year'], df['yield_kg_ha']):
+            acc = accumulators[district]
+            y = float(value)
+            acc['n'] += 1
+            delta = y - acc['mean']
+            acc['mean'] += delta / acc['n']
+            acc['m2'] += delta * (y - acc['mean'])
+            acc['min'] = min(acc['min'], y)
+            acc['max'] = max(acc['max'], y)
+            bisect.insort(acc['sorted_yields'], y)
+            
+            # Move the year's average in the trend sums
+            x = float(year)
+            entry = acc['years'].get(int(year))
+            if entry is None:
+                entry = acc['years'][int(year)] = [0.0, 0]
+                previous_avg = 0.0
+                acc['t_n'] += 1
+                acc['sum_x'] += x
+                acc['sum_x2'] += x * x
+            else:
+                previous_avg = entry[0] / entry[1]
+            entry[0] += y
+            entry[1] += 1
+            change = entry[0] / entry[1] - previous_avg
+            acc['sum_y'] += change
+            acc['sum_xy'] += x * change
+        return DistrictStatsEngine(accumulators), touched
+    
+    def stats(self, district):
+        """Statistics in the `district_stats` layout"""
+        acc = self.accumulators[district]
+        n, mean = acc['n'], acc['mean']
+        std = float(np.sqrt(acc['m2'] / (n - 1))) if n > 1 else 0.0
+        values = acc['sorted_yields']
+        
+        # Least-squares slope of the yearly averages (kg/ha per year)
+        t_n = acc['t_n']
+        denominator = t_n * acc['sum_x2'] - acc['sum_x'] ** 2
+        slope = (t_n * acc['sum_xy'] - acc['sum_x'] * acc['sum_y']) / denominator if t_n >= 2 and denominator else 0.0
+        if slope > TREND_THRESHOLD_KG_HA:
+            trend = 'increasing'
+        elif slope < -TREND_THRESHOLD_KG_HA:
+            trend = 'declining'
+        else:
+            trend = 'stable'
+        
+        return {
+            'avg_yield': round(float(mean), 2),
+            'std_yield': round(std, 2),
+            'min_yield': float(acc['min']),
+            'max_yield': float(acc['max']),
+            'median_yield': float((values[(n - 1) // 2] + values[n // 2]) / 2),
+            'records': n,
+            'years_of_data': t_n,
+            'stability_index': min(round(std / mean, 4), 1.0) if mean > 0 else 1.0,  # coefficient of variation
+            'trend': trend,
+            'trend_slope': round(float(slope / mean), 4) if mean > 0 else 0.0,  # relative: 0.01 = 1% per year
+            'climate_zone': get_climate_zone(district)
+        }
+    
+    def all_stats(self):
+        return {district: self.stats(district) for district in self.accumulators}
+
+
 class YieldPredictor:
     """Machine Learning model for yield prediction"""
     
     def __init__(self, data_path=None):
         self.model = None
         self.scaler = StandardScaler()
-        self.district_encoder = LabelEncoder()
-        self.season_encoder = LabelEncoder()
+        self.features = YieldFeaturePipeline()
         self.feature_names = []
         self.district_stats = {}
+        self.stats_engine = None
         self.historical_data = None
+        self._forecast = None
+        self._forecast_lock = threading.RLock()
         
         if data_path:
             self.load_data(data_path)
@@ -82,21 +396,10 @@ class YieldPredictor:
             with open(data_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
-            # Check if it's our generated format with 'historical_data' key
+            # Our generated format keeps the records under 'historical_data'; its precomputed
+            # 'district_statistics' are recomputed below with the same formulas
             if isinstance(data, dict) and 'historical_data' in data:
                 self.historical_data = pd.DataFrame(data['historical_data'])
-                # Also load pre-calculated district stats if available
-                if 'district_statistics' in data:
-                    for district, stats in data['district_statistics'].items():
-                        self.district_stats[district] = {
-                            'avg_yield': stats.get('avg_yield_kg_ha', 0),
-                            'std_yield': stats.get('std_dev', 0),
-                            'min_yield': stats.get('min_yield_kg_ha', 0),
-                            'max_yield': stats.get('max_yield_kg_ha', 0),
-                            'stability_index': 1 - stats.get('stability_index', 0.5),  # Convert to CV
-                            'trend_slope': stats.get('trend_per_year', 0),
-                            'climate_zone': self._get_climate_zone(district)
-                        }
             else:
                 # Plain JSON array
                 self.historical_data = pd.DataFrame(data)
@@ -105,96 +408,103 @@ class YieldPredictor:
         
         print(f"Loaded {len(self.historical_data)} records")
         
-        # Calculate district statistics if not already loaded
-        if not self.district_stats:
-            self._calculate_district_stats()
+        # One groupby pass; kept so append_records can update the statistics incrementally
+        self.stats_engine = DistrictStatsEngine.fit(self.historical_data)
+        self._calculate_district_stats()
+        
+        # Models saved without the fitted area lookup take it from the data
+        if not self.features.has_history:
+            self.features.fit_history(self.historical_data)
+        self._invalidate_forecasts()
     
     def _calculate_district_stats(self):
         """Calculate historical statistics for each district"""
-        if self.historical_data is None:
+        if self.stats_engine is None:
             return
+        self.district_stats = self.stats_engine.all_stats()
+    
+    def append_records(self, records):
+        """
+        Add new seasonal records (e.g. a DCS release) without reloading the history
         
-        for district in self.historical_data['district'].unique():
-            district_data = self.historical_data[self.historical_data['district'] == district]
-            
-            yields = district_data['yield_kg_ha'].values
+        `records` is a DataFrame or a list of dicts with district, season, year
+        and yield_kg_ha (harvested_area_ha optional). Statistics of the districts
+        they touch are updated incrementally, the model's area lookups are
+        refreshed for the affected district/season pairs and the forecast table
+        is rebuilt. Invalid records raise ValueError and leave the predictor
+        unchanged. Returns the updated districts.
+        """
+        new = self._validate_records(records)
+        if new.empty:
+            return []
+        
+        with self._forecast_lock:
+            # Build everything aside, then swap it in together
+            if self.historical_data is None:
+                history, engine = new, DistrictStatsEngine()
+            else:
+                history, engine = pd.concat([self.historical_data, new], ignore_index=True), self.stats_engine
+            engine, districts = engine.with_records(new)
+            district_stats = {**self.district_stats, **{d: engine.stats(d) for d in districts}}
             
-            self.district_stats[district] = {
-                'avg_yield': float(np.mean(yields)),
-                'std_yield': float(np.std(yields)),
-                'min_yield': float(np.min(yields)),
-                'max_yield': float(np.max(yields)),
-                'median_yield': float(np.median(yields)),
-                'records': len(yields),
-                'stability_index': float(np.std(yields) / np.mean(yields)) if np.mean(yields) > 0 else 1.0,
-                'climate_zone': self._get_climate_zone(district)
-            }
+            features = self.features.copy()
+            pairs = pd.MultiIndex.from_frame(new[['district', 'season']].drop_duplicates())
+            affected = pd.MultiIndex.from_frame(history[['district', 'season']]).isin(pairs)
+            features.fit_history(history[affected])
             
-            # Calculate trend
-            if len(district_data) >= 3:
-                sorted_data = district_data.sort_values('year')
-                years = sorted_data['year'].values
-                yields = sorted_data['yield_kg_ha'].values
-                
-                # Simple linear regression
-                n = len(years)
-                if n > 1:
-                    sum_x = np.sum(years)
-                    sum_y = np.sum(yields)
-                    sum_xy = np.sum(years * yields)
-                    sum_x2 = np.sum(years * years)
-                    
-                    slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x * sum_x + 1e-10)
-                    
-                    if slope > 20:
-                        trend = 'increasing'
-                    elif slope < -20:
-                        trend = 'declining'
-                    else:
-                        trend = 'stable'
-                    
-                    self.district_stats[district]['trend'] = trend
-                    self.district_stats[district]['trend_slope'] = float(slope)
+            previous = (self.historical_data, self.stats_engine, self.district_stats, self.features, self._forecast)
+            self.historical_data, self.stats_engine, self.district_stats, self.features = \
+                history, engine, district_stats, features
+            try:
+                table = previous[-1]
+                if table is None:
+                    self._invalidate_forecasts()
+                else:
+                    self.build_forecast_table(table.first_year, table.last_year)
+            except Exception:
+                self.historical_data, self.stats_engine, self.district_stats, self.features, self._forecast = previous
+                raise
+        
+        print(f"Appended {len(new)} records ({len(districts)} districts updated)")
+        return districts
+    
+    def _validate_records(self, records):
+        """New records as a typed DataFrame; ValueError for missing columns or unusable values"""
+        new = records if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+        missing = {'district', 'season', 'year', 'yield_kg_ha'} - set(new.columns)
+        if missing:
+            raise ValueError(f"Records missing columns: {', '.join(sorted(missing))}")
+        
+        new = new.reset_index(drop=True)
+        try:
+            years = pd.to_numeric(new['year']).astype(np.float64)
+            new['yield_kg_ha'] = pd.to_numeric(new['yield_kg_ha']).astype(np.float64)
+            if 'harvested_area_ha' in new:
+                new['harvested_area_ha'] = pd.to_numeric(new['harvested_area_ha']).astype(np.float64)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Records have non-numeric values: {e}") from e
+        
+        if not (np.isfinite(years) & (years % 1 == 0)).all():
+            raise ValueError("Records need a whole-number year")
+        new['year'] = years.astype(np.int64)
+        if not (np.isfinite(new['yield_kg_ha']) & (new['yield_kg_ha'] >= 0)).all():
+            raise ValueError("Records need a finite, non-negative yield_kg_ha")
+        if 'harvested_area_ha' in new and (np.isinf(new['harvested_area_ha']) | (new['harvested_area_ha'] < 0)).any():
+            raise ValueError("Records have an invalid harvested_area_ha")
+        unknown = set(new['season']) - set(FORECAST_SEASONS)
+        if unknown:
+            raise ValueError(f"Unknown seasons: {', '.join(sorted(map(str, unknown)))}")
+        if not new['district'].map(lambda d: isinstance(d, str) and bool(d)).all():
+            raise ValueError("Records need a district name")
+        return new
     
     def _get_climate_zone(self, district):
         """Get climate zone for a district"""
-        for zone, districts in CLIMATE_ZONES.items():
-            if district in districts:
-                return zone
-        return "Unknown"
+        return get_climate_zone(district)
     
     def prepare_features(self, df):
-        """Prepare features for model training/prediction"""
-        features = df.copy()
-        
-        # Encode categorical variables
-        features['district_encoded'] = self.district_encoder.fit_transform(features['district'])
-        features['season_encoded'] = self.season_encoder.fit_transform(features['season'])
-        
-        # Add climate zone
-        features['climate_zone'] = features['district'].apply(self._get_climate_zone)
-        climate_encoder = LabelEncoder()
-        features['climate_zone_encoded'] = climate_encoder.fit_transform(features['climate_zone'])
-        
-        # Add year-based features
-        features['year_normalized'] = (features['year'] - 2015) / 10
-        
-        # Add lagged yield (previous year's yield for same district/season)
-        features['prev_yield'] = features.groupby(['district', 'season'])['yield_kg_ha'].shift(1)
-        features['prev_yield'] = features['prev_yield'].fillna(features['yield_kg_ha'].mean())
-        
-        # Add rolling mean
-        features['rolling_yield_3yr'] = features.groupby(['district', 'season'])['yield_kg_ha'].transform(
-            lambda x: x.rolling(3, min_periods=1).mean()
-        )
-        
-        self.feature_names = [
-            'district_encoded', 'season_encoded', 'climate_zone_encoded',
-            'year_normalized', 'prev_yield', 'rolling_yield_3yr',
-            'harvested_area_ha'
-        ]
-        
-        return features[self.feature_names]
+        """Prepare features for model training with the fitted feature pipeline"""
+        return self.features.transform(df)[self.feature_names]
     
     def train(self, test_size=0.2):
         """Train the yield prediction model"""
@@ -205,7 +515,9 @@ class YieldPredictor:
         if self.historical_data is None:
             raise ValueError("No data loaded. Call load_data() first.")
         
-        # Prepare features
+        # Fit the feature pipeline once, then encode the training rows with it
+        self.features = YieldFeaturePipeline.fit(self.historical_data)
+        self.feature_names = list(YieldFeaturePipeline.FEATURE_NAMES)
         X = self.prepare_features(self.historical_data)
         y = self.historical_data['yield_kg_ha']
         
@@ -231,6 +543,7 @@ class YieldPredictor:
             random_state=42
         )
         self.model.fit(X_train_scaled, y_train)
+        self._invalidate_forecasts()
         
         # Evaluate
         y_pred = self.model.predict(X_test_scaled)
@@ -250,94 +563,219 @@ class YieldPredictor:
         
         return metrics
     
-    def predict(self, district, season, year, area_ha=None):
-        """Predict yield for a given district, season, and year"""
-        import random
-        
-        if district not in self.district_stats:
-            # Use average if district not in training data
-            avg_yield = np.mean([s['avg_yield'] for s in self.district_stats.values()])
-            return {
-                'predicted_yield_kg_ha': avg_yield,
-                'confidence': 'low',
-                'method': 'fallback_average'
-            }
+    def _invalidate_forecasts(self):
+        """Drop the forecast table (the model or the district data changed)"""
+        self._forecast = None
+    
+    def _forecast_cells(self, districts, season_idx, years):
+        """
+        Columnar forecast core: yields and method codes for parallel arrays of known districts
         
-        stats = self.district_stats[district]
-        
-        # If model is trained, use it
-        if self.model is not None:
-            # Prepare input features
-            input_data = pd.DataFrame([{
-                'district': district,
-                'season': season,
-                'year': year,
-                'harvested_area_ha': area_ha or stats.get('avg_area', 10000),
-                'yield_kg_ha': stats['avg_yield']  # placeholder for feature engineering
-            }])
-            
-            try:
-                X = self.prepare_features(input_data)
-                X_scaled = self.scaler.transform(X)
-                base_prediction = self.model.predict(X_scaled)[0]
-                
-                # Apply year-based trend and variation
-                years_from_base = year - 2020
-                trend_adjustment = stats.get('trend_slope', 0.01) * stats['avg_yield'] * years_from_base
-                
-                # Add consistent per-year variation
-                random.seed(year * 100 + hash(district) % 1000)
-                year_variation = random.uniform(-0.02, 0.04)  # -2% to +4%
-                
-                predicted_yield = (base_prediction + trend_adjustment) * (1 + year_variation)
-                
-                # Apply season adjustment
-                if season == 'Yala':
-                    predicted_yield *= 0.93
-                
-                method = 'ml_model'
-            except:
-                predicted_yield = stats['avg_yield']
-                method = 'historical_average'
-        else:
-            # Use statistical prediction
-            base_yield = stats['avg_yield']
+        Feature building, one scaler/model call, trend adjustment, counter-based
+        year variation and season factors are array operations over all rows.
+        Districts the model was not trained on, or a failing model, fall back
+        to the historical average.
+        """
+        season_idx = np.asarray(season_idx, dtype=np.intp)
+        years = np.asarray(years, dtype=np.int64)
+        if not len(years):
+            return np.empty(0), np.empty(0, dtype=np.uint8)
+        
+        unique, inverse = np.unique(np.asarray(districts, dtype=str), return_inverse=True)
+        stats = [self.district_stats[d] for d in unique]
+        avg_yield = np.array([s['avg_yield'] for s in stats], dtype=np.float64)[inverse]
+        keys = np.array([district_key(d) for d in unique], dtype=np.uint64)[inverse]
+        years_from_base = years - 2020
+        yala = season_idx == FORECAST_SEASONS.index('Yala')
+        
+        if self.model is None:
+            # Statistical prediction: trend slope is relative (0.01 = 1% per year)
+            slope = np.array([s.get('trend_slope', 0) for s in stats], dtype=np.float64)[inverse]
+            yields = avg_yield + slope * avg_yield * years_from_base
+            yields *= 1 + counter_uniform(keys, years, -0.03, 0.05)  # -3% to +5%
+            yields[yala] *= 0.92  # Yala typically 8% lower
+            return yields, np.full(len(yields), FORECAST_METHODS.index('statistical'), dtype=np.uint8)
+        
+        yields = avg_yield.copy()
+        methods = np.full(len(yields), FORECAST_METHODS.index('historical_average'), dtype=np.uint8)
+        district_codes = np.array([self.features.district_index.get(d, -1) for d in unique], dtype=np.intp)[inverse]
+        rows = np.flatnonzero(district_codes >= 0)
+        if not len(rows):
+            return yields, methods
+        
+        try:
+            season_codes = np.array([self.features.season_index[s] for s in FORECAST_SEASONS], dtype=np.intp)
+            default_area = np.array([s.get('avg_area', 10000) for s in stats], dtype=np.float64)[inverse]
+            X = self.features.forecast_features(district_codes[rows], season_codes[season_idx[rows]], years[rows],
+                                                avg_yield[rows], default_area[rows])
+            base_prediction = self.model.predict(self.scaler.transform(X[self.feature_names]))
+        except Exception as e:
+            print(f"⚠️ Yield model prediction failed, using historical averages: {e}")
+            return yields, methods
+        
+        slope = np.array([s.get('trend_slope', 0.01) for s in stats], dtype=np.float64)[inverse[rows]]
+        predicted = base_prediction + slope * avg_yield[rows] * years_from_base[rows]
+        predicted *= 1 + counter_uniform(keys[rows], years[rows], -0.02, 0.04)  # -2% to +4%
+        predicted[yala[rows]] *= 0.93
+        yields[rows] = predicted
+        methods[rows] = FORECAST_METHODS.index('ml_model')
+        return yields, methods
+    
+    def _forecast_grid(self, districts, years):
+        """Yields and method codes, each (districts, seasons, years), for every cell of a grid"""
+        years = np.asarray(years, dtype=np.int64)
+        d_idx, s_idx, y_idx = [a.ravel() for a in np.meshgrid(
+            np.arange(len(districts)), np.arange(len(FORECAST_SEASONS)), np.arange(len(years)), indexing='ij'
+        )]
+        yields, methods = self._forecast_cells(np.asarray(districts, dtype=object)[d_idx], s_idx, years[y_idx])
+        shape = (len(districts), len(FORECAST_SEASONS), len(years))
+        return yields.reshape(shape), methods.reshape(shape)
+    
+    def build_forecast_table(self, first_year=None, last_year=None):
+        """
+        Precompute yields for every district x season x year in one batch
+        
+        Covers FORECAST_HORIZON_YEARS either side of the current year by default;
+        predictions for cells in the table are an array lookup.
+        """
+        this_year = datetime.now().year
+        first_year = this_year - FORECAST_HORIZON_YEARS if first_year is None else first_year
+        last_year = this_year + FORECAST_HORIZON_YEARS if last_year is None else last_year
+        districts = list(self.district_stats)
+        
+        yields, methods = self._forecast_grid(districts, np.arange(first_year, last_year + 1))
+        table = ForecastTable(districts, first_year, yields, methods)
+        with self._forecast_lock:
+            self._forecast = table
+        return table
+    
+    def _forecast_table(self, year):
+        """The forecast table, built on first use and grown by one batch to cover `year` (None if too far out)"""
+        table = self._forecast
+        if table is not None and table.covers(year):
+            return table
+        
+        with self._forecast_lock:
+            table = self._forecast or self.build_forecast_table()
+            if table.covers(year):
+                return table
+            if max(year, table.last_year) - min(year, table.first_year) + 1 > MAX_FORECAST_SPAN:
+                return None
             
-            # Apply trend adjustment (amplify to show noticeable changes)
-            if 'trend_slope' in stats:
-                years_from_base = year - 2020
-                # Trend slope is typically small (0.01 = 1% per year)
-                # Multiply by base yield to get actual kg/ha change
-                trend_adjustment = stats['trend_slope'] * base_yield * years_from_base
-                predicted_yield = base_yield + trend_adjustment
+            # Fill only the missing years, for every district and season
+            if year < table.first_year:
+                yields, methods = self._forecast_grid(table.districts, np.arange(year, table.first_year))
+                table = ForecastTable(table.districts, year, np.concatenate([yields, table.yields], axis=2),
+                                      np.concatenate([methods, table.methods], axis=2))
             else:
-                predicted_yield = base_yield
-            
-            # Apply year-based variability (simulate natural variation)
-            import random
-            random.seed(year * 100 + hash(district) % 1000)  # Consistent seed per year/district
-            year_variation = random.uniform(-0.03, 0.05)  # -3% to +5% variation
-            predicted_yield *= (1 + year_variation)
-            
-            # Apply season adjustment
-            if season == 'Yala':
-                predicted_yield *= 0.92  # Yala typically 8% lower
-            
-            method = 'statistical'
-        
-        # Calculate confidence based on historical variability
-        cv = stats['stability_index']
-        if cv < 0.1:
-            confidence = 'high'
-        elif cv < 0.2:
-            confidence = 'medium'
+                yields, methods = self._forecast_grid(table.districts, np.arange(table.last_year + 1, year + 1))
+                table = ForecastTable(table.districts, table.first_year, np.concatenate([table.yields, yields], axis=2),
+                                      np.concatenate([table.methods, methods], axis=2))
+            self._forecast = table
+            return table
+    
+    def forecast_many(self, districts, seasons, years):
+        """
+        Predicted yields (float64) and method names (object array) for parallel district/season/year sequences
+        
+        Rows are gathered from the forecast table with one fancy-indexing step
+        (growing it first if the years fall just outside); rows far outside it
+        are computed directly. Any season other than Yala gets no seasonal
+        adjustment. Unknown districts get the all-district average
+        ('fallback_average').
+        """
+        districts = np.asarray(districts, dtype=object)
+        season_idx = (np.asarray(seasons, dtype=object) == 'Yala').astype(np.intp)
+        years = np.asarray(years, dtype=np.int64)
+        
+        known_mask = np.fromiter((d in self.district_stats for d in districts), dtype=bool, count=len(districts))
+        known = np.flatnonzero(known_mask)
+        yields = np.empty(len(districts))
+        methods = np.empty(len(districts), dtype=object)
+        if len(known) < len(districts):
+            yields[~known_mask] = np.mean([s['avg_yield'] for s in self.district_stats.values()]) \
+                if self.district_stats else np.nan
+            methods[~known_mask] = 'fallback_average'
+        if not len(known):
+            return yields, methods
+        
+        first_year, last_year = int(years[known].min()), int(years[known].max())
+        table = self._forecast_table(first_year)
+        table = table and self._forecast_table(last_year)
+        if table is not None and table.covers(first_year):
+            d_idx = np.array([table.district_index[d] for d in districts[known]], dtype=np.intp)
+            cells = (d_idx, season_idx[known], years[known] - table.first_year)
+            yields[known] = table.yields[cells]
+            codes = table.methods[cells]
         else:
-            confidence = 'low'
+            yields[known], codes = self._forecast_cells(districts[known], season_idx[known], years[known])
+        methods[known] = METHOD_NAMES[codes]
+        return yields, methods
+    
+    def _predict_columns(self, districts, seasons, years):
+        """predict() for many rows: dict of NumPy columns (yield, confidence, method)"""
+        yields, methods = self.forecast_many(districts, seasons, years)
+        known = methods != 'fallback_average'
         
+        # Confidence from each district's historical variability (unknown districts: low)
+        cv = np.array([self.district_stats[d]['stability_index'] if d in self.district_stats else np.inf
+                       for d in districts], dtype=np.float64)
         return {
-            'predicted_yield_kg_ha': round(predicted_yield, 2),
-            'confidence': confidence,
-            'method': method,
+            'predicted_yield_kg_ha': np.where(known, np.round(yields, 2), yields),
+            'confidence': CONFIDENCE_LEVELS[(cv >= 0.1).astype(np.intp) + (cv >= 0.2)],
+            'method': methods,
+        }
+    
+    def predict_many(self, df):
+        """
+        Columnar predict(): one prediction per row of `df` (district, season, year columns)
+        
+        Returns a DataFrame on the same index with predicted_yield_kg_ha,
+        confidence, method and the district's historical avg/min/max (NaN for
+        unknown districts).
+        """
+        districts = df['district'].to_numpy(dtype=object)
+        columns = self._predict_columns(districts, df['season'].to_numpy(dtype=object), df['year'].to_numpy())
+        for name, stat in (('historical_avg', 'avg_yield'), ('historical_min', 'min_yield'), ('historical_max', 'max_yield')):
+            values = {d: s[stat] for d, s in self.district_stats.items()}
+            columns[name] = np.array([values.get(d, np.nan) for d in districts], dtype=np.float64)
+        return pd.DataFrame(columns, index=df.index)
+    
+    def predict(self, district, season, year, area_ha=None):
+        """
+        Predict yield for a given district, season, and year
+        
+        Reads the forecast table cell directly when the table covers the year;
+        otherwise a single-row predict_many.
+        
+        `area_ha` (the farm size) does not change the per-hectare yield: the
+        model's area feature is the district's historical cultivated area.
+        """
+        year = int(year)
+        stats = self.district_stats.get(district)
+        table = self._forecast
+        d_idx = table.district_index.get(district) if table is not None and table.covers(year) else None
+        if stats is not None and d_idx is not None:
+            # Fast path: read the precomputed table cell directly
+            cell = (d_idx, int(season == 'Yala'), year - table.first_year)
+            cv = stats['stability_index']
+            result = {
+                'predicted_yield_kg_ha': round_scaled(float(table.yields[cell]), 2),
+                'confidence': CONFIDENCE_LEVELS[int(cv >= 0.1) + int(cv >= 0.2)],
+                'method': FORECAST_METHODS[table.methods[cell]],
+            }
+        else:
+            columns = self._predict_columns([district], [season], [year])
+            result = {name: values[0] for name, values in columns.items()}
+            if result['method'] == 'fallback_average':
+                # District not in training data
+                return result
+            stats = self.district_stats[district]
+        
+        return {
+            'predicted_yield_kg_ha': float(result['predicted_yield_kg_ha']),
+            'confidence': result['confidence'],
+            'method': result['method'],
             'historical_avg': stats['avg_yield'],
             'historical_min': stats['min_yield'],
             'historical_max': stats['max_yield']
@@ -345,7 +783,7 @@ class YieldPredictor:
     
     def predict_profit(self, district, season, year, area_ha, 
                        cost_per_ha=None, price_per_kg=None):
-        """Predict profit for a given cultivation"""
+        """Predict profit for a given cultivation (scalar; predict_profit_many for batches)"""
         
         yield_prediction = self.predict(district, season, year, area_ha)
         predicted_yield = yield_prediction['predicted_yield_kg_ha']
@@ -378,25 +816,75 @@ class YieldPredictor:
         return {
             'predicted_yield_kg_ha': predicted_yield,
             'yield_confidence': yield_prediction['confidence'],
-            'revenue_per_ha': round(revenue_per_ha, 2),
+            'revenue_per_ha': round_scaled(revenue_per_ha, 2),
             'cost_per_ha': cost,
-            'profit_per_ha': round(profit_per_ha, 2),
-            'total_revenue': round(total_revenue, 2),
-            'revenue': round(total_revenue, 2),  # Alias for frontend
-            'total_cost': round(total_cost, 2),
-            'total_profit': round(total_profit, 2),
-            'estimated_profit': round(total_profit, 2),  # Alias for frontend
-            'roi': round(roi, 1),
+            'profit_per_ha': round_scaled(profit_per_ha, 2),
+            'total_revenue': round_scaled(total_revenue, 2),
+            'revenue': round_scaled(total_revenue, 2),  # Alias for frontend
+            'total_cost': round_scaled(total_cost, 2),
+            'total_profit': round_scaled(total_profit, 2),
+            'estimated_profit': round_scaled(total_profit, 2),  # Alias for frontend
+            'roi': round_scaled(roi, 1),
             'profitability_status': profitability,
-            'break_even_yield': round(cost / price, 2),
+            'break_even_yield': round_scaled(cost / price, 2),
             'area_ha': area_ha
         }
     
+    def predict_profit_many(self, districts, seasons, years, areas, costs=None, prices=None):
+        """
+        Vectorised predict_profit() for many scenarios: a dict of NumPy columns in input order
+        
+        Has every predict_profit() key, plus the forecast 'method' and
+        'total_production_kg' from predict(). `costs` / `prices` may contain
+        None (or be None) to use the defaults.
+        """
+        n = len(districts)
+        areas = np.asarray(areas, dtype=np.float64)
+        costs = np.array([np.nan] * n if costs is None else costs, dtype=np.float64)
+        prices = np.array([np.nan] * n if prices is None else prices, dtype=np.float64)
+        costs = np.where(np.isnan(costs) | (costs == 0), TOTAL_COST_PER_HA, costs)
+        prices = np.where(np.isnan(prices) | (prices == 0), PADDY_PRICE_PER_KG, prices)
+        
+        prediction = self._predict_columns(districts, seasons, years)
+        yields = prediction['predicted_yield_kg_ha']
+        
+        revenue_per_ha = yields * prices
+        profit_per_ha = revenue_per_ha - costs
+        total_revenue = revenue_per_ha * areas
+        total_cost = costs * areas
+        total_profit = profit_per_ha * areas
+        profitability = np.select(
+            [profit_per_ha > 50000, profit_per_ha > 20000, profit_per_ha > 0],
+            ['highly_profitable', 'profitable', 'marginally_profitable'], 'loss'
+        ).astype(object)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roi = np.where(total_cost > 0, total_profit / total_cost * 100, 0)
+        
+        return {
+            'predicted_yield_kg_ha': yields,
+            'yield_confidence': prediction['confidence'],
+            'method': prediction['method'],
+            'total_production_kg': np.round(yields * areas, 2),
+            'revenue_per_ha': np.round(revenue_per_ha, 2),
+            'cost_per_ha': costs,
+            'profit_per_ha': np.round(profit_per_ha, 2),
+            'total_revenue': np.round(total_revenue, 2),
+            'revenue': np.round(total_revenue, 2),  # Alias for frontend
+            'total_cost': np.round(total_cost, 2),
+            'total_profit': np.round(total_profit, 2),
+            'estimated_profit': np.round(total_profit, 2),  # Alias for frontend
+            'roi': np.round(roi, 1),
+            'profitability_status': profitability,
+            'break_even_yield': np.round(costs / prices, 2),
+            'area_ha': areas
+        }
+    
     def generate_early_warning(self, district, season, year):
         """Generate early warning for a district/season"""
         
-        yield_prediction = self.predict(district, season, year)
-        predicted_yield = yield_prediction['predicted_yield_kg_ha']
+        # One prediction covers both the yield and the profitability checks
+        profit_prediction = self.predict_profit(district, season, year, 1)
+        predicted_yield = profit_prediction['predicted_yield_kg_ha']
         
         stats = self.district_stats.get(district, {})
         avg_yield = stats.get('avg_yield', 3500)
@@ -444,7 +932,6 @@ class YieldPredictor:
             })
         
         # Check profitability
-        profit_prediction = self.predict_profit(district, season, year, 1)
         if profit_prediction['profitability_status'] == 'loss':
             warnings.append({
                 'type': 'profit_warning',
@@ -579,8 +1066,7 @@ class YieldPredictor:
         model_data = {
             'model': self.model,
             'scaler': self.scaler,
-            'district_encoder': self.district_encoder,
-            'season_encoder': self.season_encoder,
+            'feature_pipeline': self.features.state(),
             'feature_names': self.feature_names,
             'district_stats': self.district_stats
         }
@@ -596,12 +1082,58 @@ class YieldPredictor:
         
         self.model = model_data['model']
         self.scaler = model_data['scaler']
-        self.district_encoder = model_data['district_encoder']
-        self.season_encoder = model_data['season_encoder']
+        if 'feature_pipeline' in model_data:
+            self.features = YieldFeaturePipeline.from_state(model_data['feature_pipeline'])
+        else:
+            # Saved before the feature pipeline: codes from the fitted LabelEncoders
+            self.features = YieldFeaturePipeline(model_data['district_encoder'].classes_.tolist(),
+                                                 model_data['season_encoder'].classes_.tolist())
         self.feature_names = model_data['feature_names']
         self.district_stats = model_data['district_stats']
+        self._invalidate_forecasts()
         print(f"Model loaded from {path}")
 
+    def save_mapped_model(self, path, source_path=None):
+        """Export the trained model as a memory-mapped pack (see mapped_weights.py)"""
+        from mapped_weights import write_pack, flatten_gradient_boosting
+        
+        arrays, boosting = flatten_gradient_boosting(self.model)
+        arrays['scaler_mean'] = self.scaler.mean_
+        arrays['scaler_scale'] = self.scaler.scale_
+        arrays['feature_area'] = self.features.area
+        meta = {
+            **boosting,
+            'district_classes': self.features.districts,
+            'season_classes': self.features.seasons,
+            'feature_names': self.feature_names,
+            'district_stats': self.district_stats
+        }
+        size = write_pack(path, 'yield_predictor', arrays, meta, source_path)
+        print(f"Mapped model saved to {path}")
+        return size
+    
+    def load_mapped_model(self, path):
+        """Map a pack written by save_mapped_model instead of unpickling the sklearn objects"""
+        from mapped_weights import read_pack, MappedGradientBoostingRegressor
+        
+        arrays, meta = read_pack(path, 'yield_predictor')
+        self.model = MappedGradientBoostingRegressor(arrays, meta['init'], meta['learning_rate'])
+        self.scaler = StandardScaler()
+        self.scaler.mean_ = arrays['scaler_mean']
+        self.scaler.scale_ = arrays['scaler_scale']
+        self.scaler.var_ = np.square(arrays['scaler_scale'])
+        self.scaler.n_features_in_ = len(arrays['scaler_mean'])
+        self.scaler.feature_names_in_ = np.array(meta['feature_names'], dtype=object)
+        self.features = YieldFeaturePipeline.from_state({
+            'districts': meta['district_classes'],
+            'seasons': meta['season_classes'],
+            'area': arrays.get('feature_area'),
+        })
+        self.feature_names = meta['feature_names']
+        self.district_stats = meta['district_stats']
+        self._invalidate_forecasts()
+        print(f"Mapped model loaded from {path}")
+
 
 def main():
     """Train and test the yield predictor"""